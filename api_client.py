@@ -0,0 +1,247 @@
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Seconds to wait for a connection and for each read from the backend
+API_CONNECT_TIMEOUT = 3.05
+API_READ_TIMEOUT = 60
+
+# Attempts per request, and the backoff before retry n (base * 2**n, jittered, capped)
+API_MAX_ATTEMPTS = 3
+API_BACKOFF_SECONDS = 0.5
+API_MAX_BACKOFF_SECONDS = 8
+
+# Responses worth retrying: a proxy in front of the backend failing to reach it, or the backend
+# unavailable for now. A 429 is retried only when its Retry-After fits within API_MAX_BACKOFF_SECONDS.
+RETRY_STATUSES = {502, 503}
+
+# Responses that mean the backend is failing and count against the circuit breaker
+# (a 429 means it is up and shedding load, so it does not)
+FAILURE_STATUSES = {500, 502, 503, 504}
+
+# Consecutive failed requests that open the circuit, and seconds before one trial request is let through
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_SECONDS = 30
+
+# Requests per endpoint kept for latency percentiles
+LATENCY_WINDOW = 100
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """The backend failed repeatedly, so requests are refused until the circuit resets"""
+
+
+class CircuitBreaker:
+    """Stop calling a backend that keeps failing, then probe it with one request at a time
+
+    Closed: requests go through and failures are counted. After
+    failure_threshold consecutive failures it opens and requests fail fast for
+    reset_seconds. Then it is half-open: one trial request goes through, and
+    its outcome closes the circuit again or reopens it.
+    """
+
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_seconds=CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trips = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_seconds:
+            return "open"
+        return "half-open"
+
+    def allow(self):
+        """Whether a request may be sent now"""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._trial_in_flight:
+                    self.trips += 1
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def stats(self):
+        return {"state": self.state, "failures": self.failures, "trips": self.trips}
+
+
+class EndpointLatency:
+    """Recent latencies and error count of one endpoint"""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.requests = 0
+        self.errors = 0
+        self._seconds = deque(maxlen=window)
+
+    def record(self, seconds, ok):
+        self.requests += 1
+        if not ok:
+            self.errors += 1
+        self._seconds.append(seconds)
+
+    def percentile(self, q):
+        if not self._seconds:
+            return 0.0
+        ordered = sorted(self._seconds)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "p50_ms": round(self.percentile(0.5) * 1000, 1),
+            "p95_ms": round(self.percentile(0.95) * 1000, 1)
+        }
+
+
+class ApiClient:
+    """Pooled HTTP session for the FastAPI backend with timeouts, retries and a circuit breaker
+
+    One instance is shared by every session of the Streamlit app, so
+    connections to the backend are kept alive and reused across reruns.
+    Requests that fail to connect or get a RETRY_STATUSES response are
+    retried with jittered exponential backoff, as are 429s that say when to
+    come back (Retry-After). The circuit breaker counts one outcome per
+    request, however many attempts it took, and per-endpoint latency is
+    tracked so callers can skip optional work while the backend is slow.
+    """
+
+    def __init__(self, base_url, pool_size=10, connect_timeout=API_CONNECT_TIMEOUT, read_timeout=API_READ_TIMEOUT,
+                 max_attempts=API_MAX_ATTEMPTS, backoff_seconds=API_BACKOFF_SECONDS):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.breaker = CircuitBreaker()
+        self.retries = 0
+        self._latency = {}
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, path, endpoint=None, **kwargs):
+        return self.request("GET", path, endpoint, **kwargs)
+
+    def post(self, path, endpoint=None, **kwargs):
+        return self.request("POST", path, endpoint, **kwargs)
+
+    def request(self, method, path, endpoint=None, **kwargs):
+        """Send a request, retrying transient failures; returns the last response or raises RequestException
+
+        endpoint names the route for latency stats (defaults to path, so pass
+        it for paths with ids in them). With stream=True only the connection
+        and status are retried, never a body that is already being read. A
+        read timeout is not retried, since the backend may still be working
+        on the request.
+        """
+        endpoint = endpoint or path
+        kwargs.setdefault("timeout", self.timeout)
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Backend unavailable, retrying in up to {self.breaker.reset_seconds:g} seconds")
+
+        try:
+            response = self._send(method, path, endpoint, **kwargs)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        if response.status_code in FAILURE_STATUSES:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def _send(self, method, path, endpoint, **kwargs):
+        for attempt in range(self.max_attempts):
+            last_attempt = attempt == self.max_attempts - 1
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, f"{self.base_url}{path}", **kwargs)
+            except requests.exceptions.ConnectionError:
+                # Includes connect timeouts: the request never reached the backend, so it is safe to resend
+                self._record(endpoint, time.perf_counter() - started, ok=False)
+                if last_attempt:
+                    raise
+                self._sleep_before_retry(attempt)
+                continue
+            except requests.exceptions.Timeout:
+                self._record(endpoint, time.perf_counter() - started, ok=False)
+                raise
+
+            self._record(endpoint, time.perf_counter() - started, ok=response.status_code not in FAILURE_STATUSES)
+            retry_after = response.headers.get("Retry-After")
+            if last_attempt or not self._should_retry(response.status_code, retry_after):
+                return response
+            response.close()
+            self._sleep_before_retry(attempt, retry_after)
+        return response
+
+    @staticmethod
+    def _should_retry(status_code, retry_after):
+        if status_code in RETRY_STATUSES:
+            return True
+        return (
+            status_code == 429
+            and retry_after is not None
+            and retry_after.isdigit()
+            and int(retry_after) <= API_MAX_BACKOFF_SECONDS
+        )
+
+    def _record(self, endpoint, seconds, ok):
+        with self._lock:
+            self._latency.setdefault(endpoint, EndpointLatency()).record(seconds, ok)
+
+    def _sleep_before_retry(self, attempt, retry_after=None):
+        self.retries += 1
+        delay = min(API_MAX_BACKOFF_SECONDS, self.backoff_seconds * 2 ** attempt)
+        delay = random.uniform(0, delay)  # full jitter, so clients that failed together do not retry together
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        time.sleep(delay)
+
+    @property
+    def available(self):
+        """False while the circuit is open and requests would fail fast"""
+        return self.breaker.state != "open"
+
+    def latency(self, endpoint, q=0.95):
+        """Recent latency of an endpoint in seconds at percentile q (0 when it has not been called)"""
+        with self._lock:
+            stats = self._latency.get(endpoint)
+            return stats.percentile(q) if stats else 0.0
+
+    def stats(self):
+        with self._lock:
+            endpoints = {endpoint: latency.stats() for endpoint, latency in self._latency.items()}
+        return {"circuit": self.breaker.stats(), "retries": self.retries, "endpoints": endpoints}
+
+    def close(self):
+        self.session.close()
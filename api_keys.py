@@ -0,0 +1,141 @@
+import os
+import time
+
+# Placeholder shipped in the config, never a usable key
+PLACEHOLDER_KEYS = {"", "your-rapidapi-key-here"}
+
+# Seconds a key sits out after upstream rate limits it (429) or rejects it (403, e.g. not subscribed)
+KEY_COOLDOWN_SECONDS = {429: 60, 403: 60 * 60}
+
+# How the next key is picked: "lru" (least recently used) or "quota" (most remaining requests)
+KEY_SELECTION_STRATEGIES = ("lru", "quota")
+
+
+def load_api_keys(keys=None, keys_file=None, key=None):
+    """Collect API keys from a comma-separated list, a file with one key per line, and a single key
+
+    Duplicates and the config placeholder are dropped; order is kept.
+    """
+    found = [item.strip() for item in (keys or "").split(",")]
+    if keys_file and os.path.exists(keys_file):
+        with open(keys_file) as f:
+            found += [line.strip() for line in f if not line.strip().startswith("#")]
+    found.append((key or "").strip())
+    return list(dict.fromkeys(item for item in found if item not in PLACEHOLDER_KEYS))
+
+
+def mask_key(key):
+    """Last four characters of a key, enough to tell keys apart in logs and /health"""
+    return f"...{key[-4:]}"
+
+
+class ApiKeyState:
+    """What we know about one key: its remaining budget per the last response, and whether it is benched"""
+
+    def __init__(self, key):
+        self.key = key
+        self.last_used = 0.0
+        self.requests = 0
+        self.evictions = 0
+        self.limit = None
+        self.remaining = None
+        self.reset_at = None
+        self.evicted_until = 0.0
+
+    @property
+    def evicted(self):
+        return time.time() < self.evicted_until
+
+    def quota_remaining(self):
+        """Remaining requests per the rate-limit headers, assuming a spent key has refilled once its reset passed"""
+        if self.remaining is None or (self.reset_at is not None and time.time() >= self.reset_at):
+            return float("inf")
+        return self.remaining
+
+    def stats(self):
+        return {
+            "key": mask_key(self.key),
+            "requests": self.requests,
+            "limit": self.limit,
+            "remaining": self.remaining,
+            "evicted_for_seconds": round(max(0.0, self.evicted_until - time.time()), 1),
+            "evictions": self.evictions
+        }
+
+
+class ApiKeyPool:
+    """Spread upstream requests across several API keys
+
+    select() hands out the least recently used key, or the one with the most
+    remaining requests, skipping keys that are benched after a 429/403 or
+    whose budget the rate-limit headers of their last response say is spent.
+    Callers report each response with record() so that state stays current.
+    """
+
+    def __init__(self, keys, strategy="lru"):
+        if strategy not in KEY_SELECTION_STRATEGIES:
+            raise ValueError(f"Unknown key selection strategy: {strategy}")
+        self.strategy = strategy
+        self._states = {key: ApiKeyState(key) for key in keys}
+
+    @property
+    def keys(self):
+        return list(self._states)
+
+    def __len__(self):
+        return len(self._states)
+
+    def available(self, exclude=()):
+        """Keys that may be used now, best first"""
+        states = [
+            state for key, state in self._states.items()
+            if key not in exclude and not state.evicted and state.quota_remaining() > 0
+        ]
+        if self.strategy == "quota":
+            states.sort(key=lambda state: (-state.quota_remaining(), state.last_used))
+        else:
+            states.sort(key=lambda state: state.last_used)
+        return [state.key for state in states]
+
+    def select(self, exclude=(), ready=None):
+        """Pick the key for the next request, preferring keys for which ready(key) is true; None when none is left"""
+        candidates = self.available(exclude)
+        if not candidates:
+            return None
+        if ready is not None:
+            candidates = [key for key in candidates if ready(key)] or candidates
+        state = self._states[candidates[0]]
+        state.last_used = time.monotonic()
+        state.requests += 1
+        return state.key
+
+    def record(self, key, status_code, headers):
+        """Update a key from an upstream response: its rate-limit headers, and a cooldown on 429/403"""
+        state = self._states[key]
+        limit = headers.get("x-ratelimit-requests-limit")
+        remaining = headers.get("x-ratelimit-requests-remaining")
+        reset = headers.get("x-ratelimit-requests-reset")
+        if limit is not None and limit.isdigit():
+            state.limit = int(limit)
+        if remaining is not None and remaining.lstrip("-").isdigit():
+            state.remaining = max(0, int(remaining))
+        if reset is not None and reset.isdigit():
+            state.reset_at = time.time() + int(reset)
+
+        if status_code in KEY_COOLDOWN_SECONDS:
+            retry_after = headers.get("retry-after")
+            cooldown = int(retry_after) if retry_after and retry_after.isdigit() else KEY_COOLDOWN_SECONDS[status_code]
+            self.evict(key, cooldown)
+
+    def evict(self, key, seconds):
+        state = self._states[key]
+        state.evicted_until = time.time() + seconds
+        state.evictions += 1
+
+    def stats(self):
+        return {
+            "strategy": self.strategy,
+            "keys": len(self._states),
+            "available": len(self.available()),
+            "per_key": [state.stats() for state in self._states.values()]
+        }
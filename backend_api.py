@@ -1,24 +1,273 @@
 from fastapi import FastAPI, HTTPException, UploadFile, File, Query
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from typing import Optional, List
-import requests
+from contextlib import asynccontextmanager
+import httpx
+import asyncio
+import copy
 import json
+import logging
+import math
 import os
+import shutil
+import tempfile
+import time
+import zipfile
 from datetime import datetime
-import PyPDF2
-import io
+import numpy as np
+from response_cache import ResponseCache, create_cache_backend
+from single_flight import SingleFlight
+from embedding_cache import EmbeddingCache
+from embedding_service import EmbeddingService
+from job_index import JobIndex, index_directory
+from job_features import JobFeatureStore, tokenize
+from lexical_index import LexicalIndex
+from ingestion import IngestionScheduler
+from api_keys import ApiKeyPool, load_api_keys
+from rate_limiter import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, MonthlyQuota, RateLimitExceeded, UpstreamRateLimiter, parse_rates
+from text_extraction import EXTRACTION_MAX_BYTES, ExtractionError, TextExtractor, copy_limited, resume_file_type, spool_to_file
+from matching import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_MODEL_NAME,
+    chunking_enabled,
+    clean_text,
+    embedding_model_key,
+    fuse_scores,
+    fusion_depends_on_set,
+    load_model,
+    pool_chunks,
+    similarity_percentages,
+    similarity_scores,
+    split_chunks,
+    top_k
+)
 
-app = FastAPI(title="Job Search API", description="Search for jobs and match with resume")
+logger = logging.getLogger(__name__)
 
-# You need to get your API key from RapidAPI
-RAPIDAPI_KEY =' your-rapidapi-key-here'  # Replace with your actual RapidAPI ke
+# You need to get your API key from RapidAPI. Several keys (RAPIDAPI_KEYS, comma-separated, or
+# RAPIDAPI_KEYS_FILE with one per line) are load balanced, each with its own rate limit and quota
+RAPIDAPI_KEY = os.getenv("RAPIDAPI_KEY", "your-rapidapi-key-here")  # Replace with your actual RapidAPI key
+RAPIDAPI_KEYS = load_api_keys(os.getenv("RAPIDAPI_KEYS"), os.getenv("RAPIDAPI_KEYS_FILE"), RAPIDAPI_KEY)
 RAPIDAPI_HOST = "jsearch.p.rapidapi.com"
 
+# Which key serves the next call: "lru" (least recently used) or "quota" (most requests left
+# according to the x-ratelimit-requests-remaining header of its last response)
+RAPIDAPI_KEY_SELECTION = os.getenv("RAPIDAPI_KEY_SELECTION", "lru")
+
+# Upstream HTTP client settings (one shared keep-alive pool per worker)
+UPSTREAM_CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "5"))
+UPSTREAM_READ_TIMEOUT = float(os.getenv("UPSTREAM_READ_TIMEOUT", "30"))
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "20"))
+UPSTREAM_MAX_KEEPALIVE = int(os.getenv("UPSTREAM_MAX_KEEPALIVE", "10"))
+
+# Admission control in front of every JSearch call: requests per second and burst per API key
+# (the plan limit), optional tighter limits per endpoint or key ("/search=2:4,/job-details=5:5"),
+# and seconds a call may wait in the queue before the request fails (or is served stale)
+RAPIDAPI_REQUESTS_PER_SECOND = float(os.getenv("RAPIDAPI_REQUESTS_PER_SECOND", "5"))
+RAPIDAPI_BURST = float(os.getenv("RAPIDAPI_BURST", "5"))
+RAPIDAPI_ENDPOINT_RATES = parse_rates(os.getenv("RAPIDAPI_ENDPOINT_RATES", ""))
+RAPIDAPI_KEY_RATES = parse_rates(os.getenv("RAPIDAPI_KEY_RATES", ""))
+RAPIDAPI_MAX_QUEUE_SECONDS = float(os.getenv("RAPIDAPI_MAX_QUEUE_SECONDS", "10"))
+
+# Monthly request quota per API key (0 only counts), tracked on disk across workers and restarts;
+# background refreshes leave the last RAPIDAPI_QUOTA_BACKGROUND_RESERVE of it to user searches
+RAPIDAPI_MONTHLY_QUOTA = int(os.getenv("RAPIDAPI_MONTHLY_QUOTA", "0"))
+RAPIDAPI_QUOTA_PATH = os.getenv("RAPIDAPI_QUOTA_PATH", os.path.join(".cache", "rapidapi_quota.sqlite3"))
+RAPIDAPI_QUOTA_BACKGROUND_RESERVE = float(os.getenv("RAPIDAPI_QUOTA_BACKGROUND_RESERVE", "0.2"))
+
+# Search response cache: "memory" (per worker) or "sqlite" (shared by all workers on the host)
+SEARCH_CACHE_BACKEND = os.getenv("SEARCH_CACHE_BACKEND", "memory")
+SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", os.path.join(".cache", "search_responses.sqlite3"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1000"))
+
+# Seconds a cached search stays fresh, by date_posted filter
+SEARCH_CACHE_TTLS = {
+    "today": 15 * 60,
+    "3days": 60 * 60,
+    "week": 3 * 60 * 60,
+    "month": 6 * 60 * 60,
+    "all": 12 * 60 * 60
+}
+SEARCH_CACHE_DEFAULT_TTL = 15 * 60
+
+# Expired search and job details responses younger than this are served when the
+# rate limiter or quota refuses a fresh upstream call
+STALE_CACHE_MAX_AGE_SECONDS = int(os.getenv("STALE_CACHE_MAX_AGE_SECONDS", str(7 * 24 * 60 * 60)))
+
+# Job details (employer reviews etc.) cache, on the same kind of backend as searches.
+# Misses ("job not found") are cached too, for a shorter time
+JOB_DETAILS_CACHE_PATH = os.getenv("JOB_DETAILS_CACHE_PATH", os.path.join(".cache", "job_details.sqlite3"))
+JOB_DETAILS_CACHE_MAX_ENTRIES = int(os.getenv("JOB_DETAILS_CACHE_MAX_ENTRIES", "5000"))
+JOB_DETAILS_CACHE_TTL = int(os.getenv("JOB_DETAILS_CACHE_TTL", str(6 * 60 * 60)))
+JOB_DETAILS_NEGATIVE_TTL = int(os.getenv("JOB_DETAILS_NEGATIVE_TTL", str(10 * 60)))
+JOB_DETAILS_BATCH_MAX = 50
+
+# Embedding service: texts per micro-batch, extra wait to fill a batch, inference
+# threads, and torch intra-op threads (0 keeps torch's default)
+EMBED_MAX_BATCH_SIZE = int(os.getenv("EMBED_MAX_BATCH_SIZE", "64"))
+EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "5"))
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "1"))
+EMBED_TORCH_THREADS = int(os.getenv("EMBED_TORCH_THREADS", "0"))
+
+# Local job corpus built from every search result, for top-K queries across all seen jobs
+JOB_INDEX_ENABLED = os.getenv("JOB_INDEX_ENABLED", "true").lower() == "true"
+JOB_INDEX_DIR = os.getenv("JOB_INDEX_DIR", os.path.join(".cache", "job_index"))
+JOB_INDEX_MAX_K = 200
+
+# Per-posting features (cleaned text, tokens, salary, posting time) kept in memory by job_id
+JOB_FEATURES_MAX_ENTRIES = int(os.getenv("JOB_FEATURES_MAX_ENTRIES", "50000"))
+
+# BM25 index over every job seen, fused with embedding scores (see HYBRID_FUSION in matching.py);
+# /top-jobs reranks this many embedding candidates per requested job
+LEXICAL_INDEX_MAX_DOCS = int(os.getenv("LEXICAL_INDEX_MAX_DOCS", "50000"))
+HYBRID_RERANK_FACTOR = 4
+
+# Background ingestion of popular searches (uses RapidAPI quota, so off unless enabled)
+INGESTION_ENABLED = os.getenv("INGESTION_ENABLED", "false").lower() == "true"
+INGESTION_QUERIES = [q.strip() for q in os.getenv(
+    "INGESTION_QUERIES",
+    "software developer jobs,data analyst jobs,ui ux designer jobs"
+).split(",") if q.strip()]
+INGESTION_COUNTRIES = [c.strip() for c in os.getenv("INGESTION_COUNTRIES", "ind").split(",") if c.strip()]
+INGESTION_DATE_POSTED = os.getenv("INGESTION_DATE_POSTED", "today")
+INGESTION_INTERVAL_SECONDS = int(os.getenv("INGESTION_INTERVAL_SECONDS", "900"))
+INGESTION_MAX_AGE_DAYS = int(os.getenv("INGESTION_MAX_AGE_DAYS", "30"))
+# Only the worker holding this file lock ingests, so N uvicorn workers do not make N times the upstream calls
+INGESTION_LOCK_PATH = os.getenv("INGESTION_LOCK_PATH", os.path.join(".cache", "ingestion.lock"))
+
+# Multi-page searches are split into per-page upstream calls run concurrently
+SEARCH_FANOUT_ENABLED = os.getenv("SEARCH_FANOUT_ENABLED", "true").lower() == "true"
+SEARCH_FANOUT_CONCURRENCY = int(os.getenv("SEARCH_FANOUT_CONCURRENCY", "5"))
+
+# Pages one search may ask for; each page is a paid upstream call
+SEARCH_FANOUT_MAX_PAGES = int(os.getenv("SEARCH_FANOUT_MAX_PAGES", "10"))
+
+# Bulk resume screening: resumes accepted per request, and resumes embedded per
+# batch while the rest are still being parsed
+SCREENING_MAX_RESUMES = int(os.getenv("SCREENING_MAX_RESUMES", "500"))
+SCREENING_EMBED_BATCH_SIZE = int(os.getenv("SCREENING_EMBED_BATCH_SIZE", "32"))
+SCREENING_MAX_JOB_IDS = 100
+SCREENING_MAX_K = 50
+ZIP_CONTENT_TYPES = ("application/zip", "application/x-zip-compressed")
+
+def http2_available():
+    """Check whether the optional h2 package is installed so httpx can speak HTTP/2"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def create_upstream_client():
+    """Create the pooled async client used for every JSearch call"""
+    return httpx.AsyncClient(
+        base_url=f"https://{RAPIDAPI_HOST}",
+        http2=http2_available(),
+        limits=httpx.Limits(
+            max_connections=UPSTREAM_MAX_CONNECTIONS,
+            max_keepalive_connections=UPSTREAM_MAX_KEEPALIVE,
+            keepalive_expiry=30.0
+        ),
+        timeout=httpx.Timeout(UPSTREAM_READ_TIMEOUT, connect=UPSTREAM_CONNECT_TIMEOUT)
+    )
+
+@asynccontextmanager
+async def lifespan(app):
+    """Open shared resources on startup and release them on shutdown"""
+    app.state.http_client = create_upstream_client()
+    app.state.api_keys = ApiKeyPool(RAPIDAPI_KEYS, RAPIDAPI_KEY_SELECTION)
+    app.state.rate_limiter = UpstreamRateLimiter(
+        RAPIDAPI_REQUESTS_PER_SECOND,
+        RAPIDAPI_BURST,
+        endpoint_rates=RAPIDAPI_ENDPOINT_RATES,
+        key_rates=RAPIDAPI_KEY_RATES,
+        quota=MonthlyQuota(RAPIDAPI_QUOTA_PATH, RAPIDAPI_MONTHLY_QUOTA, RAPIDAPI_QUOTA_BACKGROUND_RESERVE),
+        max_wait_seconds=RAPIDAPI_MAX_QUEUE_SECONDS
+    )
+    app.state.single_flight = SingleFlight()
+    app.state.search_cache = ResponseCache(create_cache_backend(
+        SEARCH_CACHE_BACKEND,
+        path=SEARCH_CACHE_PATH,
+        max_entries=SEARCH_CACHE_MAX_ENTRIES
+    ))
+    app.state.job_details_cache = ResponseCache(create_cache_backend(
+        SEARCH_CACHE_BACKEND,
+        path=JOB_DETAILS_CACHE_PATH,
+        max_entries=JOB_DETAILS_CACHE_MAX_ENTRIES
+    ))
+    app.state.embedding_cache = EmbeddingCache(embedding_model_key())
+    
+    # Load the one embedding model this worker scores with, off the event loop
+    try:
+        app.state.embedding_model = await asyncio.to_thread(load_model, EMBEDDING_MODEL_NAME)
+    except Exception as e:
+        logger.error("Could not load embedding model %s (%s backend): %s", EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND, e)
+        app.state.embedding_model = None
+    
+    # All handlers share one micro-batching encoder in front of the model
+    app.state.embedding_service = None
+    if app.state.embedding_model is not None:
+        app.state.embedding_service = EmbeddingService(
+            app.state.embedding_model,
+            embedding_cache=app.state.embedding_cache,
+            max_batch_size=EMBED_MAX_BATCH_SIZE,
+            max_wait_ms=EMBED_MAX_WAIT_MS,
+            workers=EMBED_WORKERS,
+            torch_threads=EMBED_TORCH_THREADS
+        )
+        await app.state.embedding_service.start()
+    
+    # Resumes are parsed in a bounded pool of processes with page, size and time limits
+    app.state.text_extractor = TextExtractor()
+    
+    app.state.job_features = JobFeatureStore(JOB_FEATURES_MAX_ENTRIES)
+    app.state.lexical_index = LexicalIndex(LEXICAL_INDEX_MAX_DOCS)
+    app.state.lexical_merge_running = False
+    
+    # Corpus of every job fetched so far, searchable by resume
+    # (one directory per embedding model and backend, so switching either starts a fresh corpus)
+    app.state.job_index = None
+    if JOB_INDEX_ENABLED:
+        app.state.job_index = JobIndex(index_directory(JOB_INDEX_DIR, embedding_model_key()), embedding_model_key())
+    app.state.background_tasks = set()
+    
+    # Keep popular searches warm in the response cache and the job corpus
+    app.state.ingestion = None
+    if INGESTION_ENABLED and app.state.job_index is not None:
+        app.state.ingestion = IngestionScheduler(
+            ingestion_searches(),
+            refresh_search,
+            INGESTION_INTERVAL_SECONDS,
+            expire=expire_stale_jobs,
+            lock_path=INGESTION_LOCK_PATH
+        )
+        await app.state.ingestion.start()
+    
+    try:
+        yield
+    finally:
+        if app.state.ingestion is not None:
+            await app.state.ingestion.stop()
+        for task in list(app.state.background_tasks):
+            task.cancel()
+        if app.state.embedding_service is not None:
+            await app.state.embedding_service.stop()
+        app.state.text_extractor.close()
+        if app.state.job_index is not None:
+            app.state.job_index.close()
+        await app.state.http_client.aclose()
+        app.state.rate_limiter.quota.close()
+        app.state.search_cache.close()
+        app.state.job_details_cache.close()
+        app.state.embedding_cache.close()
+
+app = FastAPI(title="Job Search API", description="Search for jobs and match with resume", lifespan=lifespan)
+
 class JobSearchRequest(BaseModel):
     query: str
     page: Optional[int] = 1
-    num_pages: Optional[int] = 1
+    num_pages: Optional[int] = Field(1, ge=1, le=SEARCH_FANOUT_MAX_PAGES)
     country: Optional[str] = "ind"
     date_posted: Optional[str] = "today"
     employment_types: Optional[str] = None
@@ -51,55 +300,236 @@ class JobResponse(BaseModel):
     job_max_salary: Optional[int]
     job_salary_period: Optional[str]
     job_benefits: Optional[List[str]]
+    job_posted_at_timestamp: Optional[float]
+    job_yearly_salary_min: Optional[float]
+    job_yearly_salary_max: Optional[float]
 
-def get_job_search_headers():
+def get_job_search_headers(api_key):
     return {
-        "X-RapidAPI-Key": RAPIDAPI_KEY,
+        "X-RapidAPI-Key": api_key,
         "X-RapidAPI-Host": RAPIDAPI_HOST
     }
 
-def extract_text_from_pdf(pdf_file):
-    """Extract text from uploaded PDF resume"""
+async def jsearch_get(path, params, priority=PRIORITY_INTERACTIVE):
+    """Send a GET request to a JSearch endpoint on the shared pooled client, once the rate limiter admits it
+
+    The call goes out on a key from the pool, preferring keys with a free
+    request slot. A key that is out of quota, rate limited (429) or rejected
+    (403) upstream is skipped and the next key is tried. Raises
+    RateLimitExceeded when every key was refused.
+    """
+    limiter = app.state.rate_limiter
+    api_keys = app.state.api_keys
+    tried = set()
+    error = RateLimitExceeded("No RapidAPI key is available")
+    rejected = None
+    while True:
+        api_key = api_keys.select(exclude=tried, ready=lambda key: limiter.ready(path, key))
+        if api_key is None:
+            break
+        tried.add(api_key)
+        try:
+            await limiter.acquire(path, api_key, priority)
+        except RateLimitExceeded as e:
+            error = e
+            continue
+        
+        response = await app.state.http_client.get(path, headers=get_job_search_headers(api_key), params=params)
+        # Tracks the key's remaining budget, and benches it on 429/403
+        api_keys.record(api_key, response.status_code, response.headers)
+        if response.status_code == 429:
+            retry_after = response.headers.get("Retry-After", "")
+            retry_after = float(retry_after) if retry_after.isdigit() else 1.0
+            # Upstream disagrees with our bucket, so hold this key back before it is asked again
+            limiter.penalize(path, api_key, retry_after)
+            error = RateLimitExceeded(f"RapidAPI rate limit exceeded: {response.text}", retry_after=retry_after)
+            continue
+        if response.status_code == 403:
+            rejected = response
+            continue
+        return response
+    
+    if rejected is not None:
+        return rejected
+    raise error
+
+def rate_limited_error(error):
+    """The 429 to return when a call was refused and there is nothing cached to serve instead"""
+    headers = {"Retry-After": str(math.ceil(error.retry_after))} if error.retry_after else None
+    return HTTPException(status_code=429, detail=str(error), headers=headers)
+
+async def stale_cache_entry(cache, cache_key):
+    """An expired cache entry still young enough to serve when upstream cannot be called"""
+    entry = await cache.get_async(cache_key, allow_stale=True)
+    if entry is None or entry.age > STALE_CACHE_MAX_AGE_SECONDS:
+        return None
+    return entry
+
+def check_api_configured():
+    """Fail fast when no RapidAPI key has been configured"""
+    if not RAPIDAPI_KEYS:
+        raise HTTPException(
+            status_code=500, 
+            detail="Please set your RAPIDAPI_KEY (or RAPIDAPI_KEYS) environment variable"
+        )
+
+async def read_resume_text(resume):
+    """Validate an uploaded resume and extract its text in the parser pool"""
+    
+    # Validate file type
+    allowed_types = ["application/pdf", "text/plain"]
+    if resume.content_type not in allowed_types:
+        raise HTTPException(
+            status_code=400,
+            detail="Only PDF and TXT files are supported"
+        )
+    
+    # The upload is already spooled by the server; copy it to a file a parser process can open
+    path = None
     try:
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text()
-        return text
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error reading PDF: {str(e)}")
+        path = await asyncio.to_thread(spool_to_file, resume.file, os.path.splitext(resume.filename or "")[1])
+        extracted = await app.state.text_extractor.extract_async(path, resume.content_type)
+    except ExtractionError as e:
+        raise HTTPException(status_code=e.status, detail=f"Error processing resume: {str(e)}")
+    finally:
+        if path is not None:
+            os.remove(path)
+    
+    if extracted.truncated:
+        logger.info("Resume %s truncated to %d of %d pages", resume.filename, extracted.pages, extracted.total_pages)
+    return extracted.text
+
+def get_embedding_service():
+    """Return the shared embedding service, or fail the request when the model could not be loaded"""
+    service = app.state.embedding_service
+    if service is None:
+        raise HTTPException(status_code=503, detail="Embedding model is not available")
+    return service
+
+async def embed_resume(resume_text):
+    """Encode a resume once per request through the shared embedding service"""
+    service = get_embedding_service()
+    clean_resume = clean_text(resume_text)
+    if not clean_resume:
+        return None
+    if chunking_enabled():
+        return (await encode_documents([clean_resume]))[0]
+    return (await service.encode([clean_resume]))[0]
+
+async def embed_resume_for_search(resume_text):
+    """Encode a resume for ranking search results, or None when the model is unavailable
 
-def extract_text_from_txt(txt_file):
-    """Extract text from uploaded text file"""
+    Searches then rank their jobs by BM25 alone rather than failing.
+    """
+    if app.state.embedding_service is None:
+        return None
     try:
-        content = txt_file.read()
-        return content.decode('utf-8')
+        return await embed_resume(resume_text)
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error reading text file: {str(e)}")
+        logger.warning("Resume embedding failed, ranking by keywords only: %s", e)
+        return None
+
+async def embed_texts(texts):
+    """Embed cleaned texts for scoring: a row per text, or a list of chunk matrices when chunking"""
+    if chunking_enabled():
+        return await encode_documents(texts)
+    return await get_embedding_service().encode(texts)
+
+async def encode_documents(texts):
+    """Chunk cleaned texts and encode all of their chunks through the embedding service in one request"""
+    service = get_embedding_service()
+    chunks, spans = await service.chunk(texts)
+    return split_chunks(await service.encode(chunks), spans)
+
+def clean_job_descriptions(jobs):
+    """(position, cleaned description) for each job with text to embed, read from the feature store"""
+    return [
+        (i, features.clean_text)
+        for i, features in enumerate(job_features_for(jobs))
+        if features.clean_text
+    ]
+
+def job_features_for(jobs):
+    """Feature records of jobs from the feature store, adding the jobs to the lexical index as well"""
+    features = app.state.job_features.features_for(jobs)
+    app.state.lexical_index.add_features(features)
+    if app.state.lexical_index.merge_due() and not app.state.lexical_merge_running:
+        # Merging a large index takes seconds, so it runs on a thread and searches score meanwhile
+        app.state.lexical_merge_running = True
+        run_in_background(merge_lexical_index())
+    return features
+
+async def merge_lexical_index():
+    try:
+        await asyncio.to_thread(app.state.lexical_index.merge)
+    finally:
+        app.state.lexical_merge_running = False
+
+def hybrid_match_scores(semantic_scores, lexical_scores, semantic=True):
+    """Fused match scores, or the saturated BM25 scores alone when there are no embedding scores"""
+    if semantic:
+        return fuse_scores(semantic_scores, lexical_scores)
+    return fuse_scores(semantic_scores, lexical_scores, fusion="weighted", lexical_weight=1.0)
+
+async def apply_hybrid_scores(resume_text, jobs, features, semantic_scores, semantic=True):
+    """Set match_score (embedding and BM25 scores fused), its two parts and matching_keywords on each job"""
+    # BM25 statistics come from every job seen, so rare skills outweigh common words.
+    # Scoring indexes queued jobs and waits for a running merge, so it runs on a thread.
+    lexical_scores, matching_keywords = await asyncio.to_thread(
+        app.state.lexical_index.score,
+        tokenize(clean_text(resume_text)),
+        [job_features.job_id for job_features in features]
+    )
+    match_scores = hybrid_match_scores(semantic_scores, lexical_scores, semantic)
+    for job, match_score, semantic_score, lexical_score, keywords in zip(
+        jobs, match_scores, semantic_scores, lexical_scores, matching_keywords
+    ):
+        job["match_score"] = match_score
+        job["semantic_score"] = semantic_score
+        job["lexical_score"] = round(float(lexical_score), 2)
+        job["matching_keywords"] = keywords  # Top 10 by BM25 weight
+    return jobs
+
+async def match_jobs_to_resume(resume_text, resume_embedding, jobs):
+    """Attach match_score and matching_keywords to each job in place
+
+    Returns whether embedding similarity is part of the scores: without a
+    resume embedding, or when the jobs cannot be encoded, they are scored by
+    BM25 alone.
+    """
+    
+    # Embedding similarity between the resume and each job description, as in the UI
+    features = job_features_for(jobs)
+    semantic_scores = [0.0] * len(jobs)
+    clean_jobs = [(i, job_features.clean_text) for i, job_features in enumerate(features) if job_features.clean_text]
+    semantic = resume_embedding is not None
+    if semantic and clean_jobs:
+        try:
+            job_embeddings = await embed_texts([text for _, text in clean_jobs])
+        except Exception as e:
+            logger.warning("Job embedding failed, ranking by keywords only: %s", e)
+            semantic = False
+        else:
+            for (i, _), score in zip(clean_jobs, similarity_percentages(resume_embedding, job_embeddings)):
+                semantic_scores[i] = score
+    
+    await apply_hybrid_scores(resume_text, jobs, features, semantic_scores, semantic)
+    return semantic
 
 @app.get("/")
 async def root():
     return {"message": "Job Search API is running"}
 
-@app.post("/search-jobs")
-async def search_jobs(search_request: JobSearchRequest):
-    """Search for jobs using JSearch API"""
-    
-    if not RAPIDAPI_KEY or RAPIDAPI_KEY == "your-rapidapi-key-here":
-        raise HTTPException(
-            status_code=500, 
-            detail="Please set your RAPIDAPI_KEY environment variable"
-        )
-    
-    url = "https://jsearch.p.rapidapi.com/search"
+def build_search_querystring(search_request):
+    """Build normalized JSearch query parameters for a search request, with defaults applied"""
     
     # Prepare query parameters
     querystring = {
         "query": search_request.query,
-        "page": str(search_request.page),
-        "num_pages": str(search_request.num_pages),
-        "country": search_request.country,
-        "date_posted": search_request.date_posted
+        "page": str(search_request.page or 1),
+        "num_pages": str(search_request.num_pages or 1),
+        "country": search_request.country or "ind",
+        "date_posted": search_request.date_posted or "today"
     }
     
     # Add optional parameters if provided
@@ -120,61 +550,243 @@ async def search_jobs(search_request: JobSearchRequest):
     if search_request.is_remote is not None:
         querystring["remote_jobs_only"] = str(search_request.is_remote).lower()
     
+    # Sorted keys and collapsed whitespace; values are sent upstream as given
+    return {key: " ".join(str(value).split()) for key, value in sorted(querystring.items())}
+
+def search_cache_key(querystring):
+    """Cache key for a search querystring, ignoring the case of the query text"""
+    return "search:" + json.dumps({**querystring, "query": querystring["query"].lower()}, sort_keys=True)
+
+def search_cache_ttl(date_posted):
+    """Fresher date filters change faster upstream, so they get shorter TTLs"""
+    return SEARCH_CACHE_TTLS.get(date_posted, SEARCH_CACHE_DEFAULT_TTL)
+
+def format_job(job):
+    """Pick the fields we expose from a raw JSearch job"""
+    return {
+        "job_id": job.get('job_id', ''),
+        "job_title": job.get('job_title', ''),
+        "employer_name": job.get('employer_name', ''),
+        "employer_logo": job.get('employer_logo'),
+        "employer_website": job.get('employer_website'),
+        "job_publisher": job.get('job_publisher', ''),
+        "job_employment_type": job.get('job_employment_type', ''),
+        "job_apply_link": job.get('job_apply_link', ''),
+        "job_description": job.get('job_description', ''),
+        "job_is_remote": job.get('job_is_remote', False),
+        "job_posted_at": job.get('job_posted_at', ''),
+        "job_location": job.get('job_location', ''),
+        "job_city": job.get('job_city'),
+        "job_state": job.get('job_state'),
+        "job_country": job.get('job_country', ''),
+        "job_salary": job.get('job_salary'),
+        "job_min_salary": job.get('job_min_salary'),
+        "job_max_salary": job.get('job_max_salary'),
+        "job_salary_period": job.get('job_salary_period'),
+        "job_benefits": job.get('job_benefits')
+    }
+
+async def fetch_search_jobs(querystring, priority=PRIORITY_INTERACTIVE):
+    """Run one search against JSearch and return the formatted jobs"""
+    response = await jsearch_get("/search", querystring, priority)
+    
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=f"API request failed: {response.text}"
+        )
+    
+    data = response.json()
+    return add_job_features([format_job(job) for job in data.get('data') or []])
+
+def add_job_features(jobs):
+    """Build each job's feature record once and expose its parsed posting time and yearly salary"""
+    for job, features in zip(jobs, job_features_for(jobs)):
+        job["job_posted_at_timestamp"] = features.posted_at
+        job["job_yearly_salary_min"] = features.salary_min
+        job["job_yearly_salary_max"] = features.salary_max
+    return jobs
+
+def run_in_background(coroutine):
+    """Run a coroutine after the response without blocking it, keeping a reference until it finishes"""
+    task = asyncio.create_task(coroutine)
+    app.state.background_tasks.add(task)
+    task.add_done_callback(app.state.background_tasks.discard)
+    return task
+
+async def index_jobs(jobs):
+    """Embed freshly fetched jobs and add them to the local job corpus"""
+    job_index = app.state.job_index
+    service = app.state.embedding_service
+    if job_index is None or service is None or not jobs:
+        return 0
     try:
-        headers = get_job_search_headers()
-        response = requests.get(url, headers=headers, params=querystring)
-        
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"API request failed: {response.text}"
-            )
+        clean_jobs = clean_job_descriptions(jobs)
+        jobs = [jobs[i] for i, _ in clean_jobs]
+        texts = [text for _, text in clean_jobs]
         
-        data = response.json()
+        # Only new or changed postings are embedded
+        changed = await asyncio.to_thread(job_index.changed, jobs, texts)
+        if not changed:
+            return 0
+        jobs = [jobs[i] for i in changed]
+        texts = [texts[i] for i in changed]
+        if chunking_enabled():
+            # The index holds one vector per posting, so chunk embeddings are pooled
+            embeddings = np.vstack([pool_chunks(chunks) for chunks in await encode_documents(texts)])
+        else:
+            embeddings = await service.encode(texts)
+        return await asyncio.to_thread(job_index.upsert_many, jobs, texts, embeddings)
+    except Exception as e:
+        logger.warning("Could not index %d jobs: %s", len(jobs), e)
+        return 0
+
+async def fetch_and_cache_search(querystring, index=True, priority=PRIORITY_INTERACTIVE):
+    """Fetch a search upstream, store it in the response cache and (by default) index it in the background"""
+    jobs = await fetch_search_jobs(querystring, priority)
+    await app.state.search_cache.set_async(search_cache_key(querystring), jobs, search_cache_ttl(querystring.get("date_posted")))
+    if index:
+        run_in_background(index_jobs(copy.deepcopy(jobs)))
+    return jobs
+
+async def cached_search_jobs(querystring):
+    """Return (jobs, cache metadata) for a search, serving fresh results from the response cache"""
+    cache_key = search_cache_key(querystring)
+    
+    entry = await app.state.search_cache.get_async(cache_key)
+    if entry is not None:
+        return entry.value, {"hit": True, "age_seconds": round(entry.age, 1)}
+    
+    # Concurrent identical searches share one upstream call; each caller gets its own copy
+    try:
+        jobs = await app.state.single_flight.do(cache_key, lambda: fetch_and_cache_search(querystring))
+    except RateLimitExceeded as e:
+        # Out of upstream budget: old results beat an error
+        entry = await stale_cache_entry(app.state.search_cache, cache_key)
+        if entry is None:
+            raise rate_limited_error(e)
+        return entry.value, {"hit": True, "stale": True, "age_seconds": round(entry.age, 1)}
+    return copy.deepcopy(jobs), {"hit": False, "age_seconds": 0.0}
+
+async def refresh_search(querystring):
+    """Re-fetch a search regardless of cache freshness and index its new postings (used by ingestion)"""
+    jobs = await app.state.single_flight.do(
+        search_cache_key(querystring),
+        lambda: fetch_and_cache_search(querystring, index=False, priority=PRIORITY_BACKGROUND)
+    )
+    return await index_jobs(copy.deepcopy(jobs))
+
+async def expire_stale_jobs():
+    """Drop postings older than the ingestion age limit from the job corpus"""
+    cutoff = time.time() - INGESTION_MAX_AGE_DAYS * 24 * 60 * 60
+    return await asyncio.to_thread(app.state.job_index.expire, cutoff)
+
+def ingestion_searches():
+    """Normalized querystrings for every configured ingestion query and country"""
+    return [
+        build_search_querystring(JobSearchRequest(query=query, country=country, date_posted=INGESTION_DATE_POSTED))
+        for query in INGESTION_QUERIES
+        for country in INGESTION_COUNTRIES
+    ]
+
+def page_querystrings(querystring):
+    """Split a multi-page querystring into one single-page querystring per page"""
+    first_page = int(querystring["page"])
+    num_pages = int(querystring["num_pages"])
+    return [
+        {**querystring, "page": str(first_page + offset), "num_pages": "1"}
+        for offset in range(num_pages)
+    ]
+
+def merge_job_pages(pages):
+    """Merge per-page job lists in page order, keeping the first occurrence of each job_id"""
+    seen_job_ids = set()
+    merged = []
+    for jobs in pages:
+        for job in jobs:
+            job_id = job.get("job_id")
+            if job_id:
+                if job_id in seen_job_ids:
+                    continue
+                seen_job_ids.add(job_id)
+            merged.append(job)
+    return merged
+
+async def fan_out_search_jobs(querystring):
+    """Fetch every page of a multi-page search concurrently, each page cached on its own"""
+    semaphore = asyncio.Semaphore(SEARCH_FANOUT_CONCURRENCY)
+    
+    async def fetch_page(page_querystring):
+        async with semaphore:
+            return await cached_search_jobs(page_querystring)
+    
+    per_page = page_querystrings(querystring)
+    results = await asyncio.gather(*[fetch_page(q) for q in per_page], return_exceptions=True)
+    
+    # Only fail the whole search when no page came back
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if len(errors) == len(results):
+        raise errors[0]
+    
+    pages = []
+    page_info = []
+    for page_querystring, result in zip(per_page, results):
+        page = int(page_querystring["page"])
+        if isinstance(result, BaseException):
+            detail = result.detail if isinstance(result, HTTPException) else str(result)
+            page_info.append({"page": page, "error": detail})
+            continue
+        jobs, cache_info = result
+        pages.append(jobs)
+        page_info.append({"page": page, **cache_info})
+    
+    fetched = [info for info in page_info if "error" not in info]
+    cache_info = {
+        "hit": all(info["hit"] for info in fetched),
+        "age_seconds": max(info["age_seconds"] for info in fetched),
+        "stale": any(info.get("stale") for info in fetched),
+        "pages": page_info
+    }
+    return merge_job_pages(pages), cache_info
+
+@app.post("/search-jobs")
+async def search_jobs(search_request: JobSearchRequest):
+    """Search for jobs using JSearch API"""
+    
+    check_api_configured()
+    
+    querystring = build_search_querystring(search_request)
+    
+    try:
+        if SEARCH_FANOUT_ENABLED and int(querystring["num_pages"]) > 1:
+            jobs, cache_info = await fan_out_search_jobs(querystring)
+        else:
+            jobs, cache_info = await cached_search_jobs(querystring)
+        cache_info["hit_ratio"] = app.state.search_cache.hit_ratio
         
         # Format the response
-        if 'data' in data and data['data']:
-            jobs = []
-            for job in data['data']:
-                job_data = {
-                    "job_id": job.get('job_id', ''),
-                    "job_title": job.get('job_title', ''),
-                    "employer_name": job.get('employer_name', ''),
-                    "employer_logo": job.get('employer_logo'),
-                    "employer_website": job.get('employer_website'),
-                    "job_publisher": job.get('job_publisher', ''),
-                    "job_employment_type": job.get('job_employment_type', ''),
-                    "job_apply_link": job.get('job_apply_link', ''),
-                    "job_description": job.get('job_description', ''),
-                    "job_is_remote": job.get('job_is_remote', False),
-                    "job_posted_at": job.get('job_posted_at', ''),
-                    "job_location": job.get('job_location', ''),
-                    "job_city": job.get('job_city'),
-                    "job_state": job.get('job_state'),
-                    "job_country": job.get('job_country', ''),
-                    "job_salary": job.get('job_salary'),
-                    "job_min_salary": job.get('job_min_salary'),
-                    "job_max_salary": job.get('job_max_salary'),
-                    "job_salary_period": job.get('job_salary_period'),
-                    "job_benefits": job.get('job_benefits')
-                }
-                jobs.append(job_data)
-            
+        if jobs:
             return {
                 "status": "success",
                 "total_jobs": len(jobs),
                 "jobs": jobs,
-                "search_parameters": search_request.dict()
+                "search_parameters": search_request.dict(),
+                "cache": cache_info
             }
         else:
             return {
                 "status": "success",
                 "total_jobs": 0,
                 "jobs": [],
-                "message": "No jobs found for the given criteria"
+                "message": "No jobs found for the given criteria",
+                "cache": cache_info
             }
             
-    except requests.exceptions.RequestException as e:
+    except HTTPException:
+        raise
+    except httpx.TimeoutException as e:
+        raise HTTPException(status_code=504, detail=f"API request timed out: {str(e)}")
+    except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"API request error: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
@@ -183,7 +795,7 @@ async def search_jobs(search_request: JobSearchRequest):
 async def search_jobs_simple(
     query: str = Query(..., description="Job search query"),
     page: int = Query(1, description="Page number"),
-    num_pages: int = Query(1, description="Number of pages"),
+    num_pages: int = Query(1, ge=1, le=SEARCH_FANOUT_MAX_PAGES, description="Number of pages"),
     country: str = Query("ind", description="Country code"),
     date_posted: str = Query("today", description="Date posted filter")
 ):
@@ -204,29 +816,14 @@ async def search_jobs_with_resume(
     query: str = Query(..., description="Job search query"),
     resume: UploadFile = File(..., description="Resume file (PDF or TXT)"),
     page: int = Query(1, description="Page number"),
-    num_pages: int = Query(1, description="Number of pages"),
+    num_pages: int = Query(1, ge=1, le=SEARCH_FANOUT_MAX_PAGES, description="Number of pages"),
     country: str = Query("ind", description="Country code"),
     date_posted: str = Query("today", description="Date posted filter")
 ):
     """Search for jobs and match with uploaded resume"""
     
-    # Validate file type
-    allowed_types = ["application/pdf", "text/plain"]
-    if resume.content_type not in allowed_types:
-        raise HTTPException(
-            status_code=400,
-            detail="Only PDF and TXT files are supported"
-        )
-    
-    # Extract text from resume
-    resume_text = ""
-    try:
-        if resume.content_type == "application/pdf":
-            resume_text = extract_text_from_pdf(resume.file)
-        elif resume.content_type == "text/plain":
-            resume_text = extract_text_from_txt(resume.file)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error processing resume: {str(e)}")
+    resume_text = await read_resume_text(resume)
+    resume_embedding = await embed_resume_for_search(resume_text)
     
     # Search for jobs
     search_request = JobSearchRequest(
@@ -239,17 +836,9 @@ async def search_jobs_with_resume(
     
     job_results = await search_jobs(search_request)
     
-    # Simple keyword matching for demonstration
-    # In a real application, you'd use more sophisticated NLP/ML techniques
-    resume_keywords = set(resume_text.lower().split())
-    
+    semantic = resume_embedding is not None
     if job_results["jobs"]:
-        for job in job_results["jobs"]:
-            job_keywords = set((job["job_description"] + " " + job["job_title"]).lower().split())
-            matching_keywords = resume_keywords.intersection(job_keywords)
-            match_score = len(matching_keywords) / len(job_keywords) if job_keywords else 0
-            job["match_score"] = round(match_score * 100, 2)
-            job["matching_keywords"] = list(matching_keywords)[:10]  # Limit to top 10
+        semantic = await match_jobs_to_resume(resume_text, resume_embedding, job_results["jobs"])
         
         # Sort jobs by match score
         job_results["jobs"].sort(key=lambda x: x["match_score"], reverse=True)
@@ -258,39 +847,485 @@ async def search_jobs_with_resume(
         **job_results,
         "resume_processed": True,
         "resume_length": len(resume_text),
-        "message": "Jobs ranked by relevance to your resume"
+        "semantic_scoring": semantic,
+        "message": "Jobs ranked by relevance to your resume" if semantic else
+            "Jobs ranked by keywords in your resume: the embedding model is unavailable"
     }
 
-@app.get("/job-details/{job_id}")
-async def get_job_details(job_id: str):
-    """Get detailed information about a specific job"""
+async def iter_search_events(search_request, resume_text=None, resume_embedding=None):
+    """Yield search events page by page as upstream pages arrive, scoring jobs when a resume is given
+
+    With a fusion that ranks jobs against each other (rrf), pages are scored
+    as they arrive and a final "scores" event carries every job's match_score
+    fused over the whole result set, in the order the jobs were sent. The done
+    event tells whether embedding similarity was part of the scores.
+    """
+    querystring = build_search_querystring(search_request)
+    if SEARCH_FANOUT_ENABLED and int(querystring["num_pages"]) > 1:
+        per_page = page_querystrings(querystring)
+    else:
+        per_page = [querystring]
+    
+    semaphore = asyncio.Semaphore(SEARCH_FANOUT_CONCURRENCY)
+    
+    async def fetch_page(page_querystring):
+        async with semaphore:
+            try:
+                return page_querystring, await cached_search_jobs(page_querystring), None
+            except HTTPException as e:
+                return page_querystring, None, e.detail
+            except httpx.HTTPError as e:
+                return page_querystring, None, f"API request error: {str(e)}"
+            except Exception as e:
+                logger.exception("Fetching search page %s failed", page_querystring["page"])
+                return page_querystring, None, f"Unexpected error: {str(e)}"
+    
+    tasks = [asyncio.ensure_future(fetch_page(q)) for q in per_page]
+    seen_job_ids = set()
+    scored_jobs = []
+    # The final "scores" event lines up with the jobs sent only if every page was scored
+    all_scored = True
+    semantic = resume_embedding is not None
+    total_jobs = 0
+    try:
+        # Emit pages in completion order so the first results are not held behind slower pages
+        for next_page in asyncio.as_completed(tasks):
+            page_querystring, result, error = await next_page
+            page = int(page_querystring["page"])
+            if error is not None:
+                yield {"event": "error", "page": page, "detail": error}
+                continue
+            
+            jobs, cache_info = result
+            jobs = [
+                job for job in jobs
+                if not job.get("job_id") or job["job_id"] not in seen_job_ids
+            ]
+            seen_job_ids.update(job["job_id"] for job in jobs if job.get("job_id"))
+            if resume_text is not None:
+                try:
+                    if not await match_jobs_to_resume(resume_text, resume_embedding if semantic else None, jobs):
+                        semantic = False
+                    scored_jobs.extend(jobs)
+                except Exception as e:
+                    # Send the page unscored rather than dropping it
+                    logger.exception("Scoring search page %s failed", page)
+                    yield {"event": "error", "page": page, "detail": f"Could not score jobs: {str(e)}"}
+                    all_scored = False
+            
+            for job in jobs:
+                yield {"event": "job", "page": page, "job": job}
+            total_jobs += len(jobs)
+            yield {"event": "page", "page": page, "total_jobs": len(jobs), "cache": cache_info}
+    except Exception as e:
+        logger.exception("Search stream failed")
+        yield {"event": "error", "detail": f"Search failed: {str(e)}"}
+        all_scored = False
+    finally:
+        for task in tasks:
+            task.cancel()
+    
+    if fusion_depends_on_set() and len(per_page) > 1 and scored_jobs and all_scored:
+        match_scores = hybrid_match_scores(
+            [job["semantic_score"] for job in scored_jobs],
+            [job["lexical_score"] for job in scored_jobs],
+            semantic
+        )
+        yield {"event": "scores", "match_scores": match_scores}
+    
+    done = {"event": "done", "total_jobs": total_jobs, "search_parameters": search_request.dict()}
+    if resume_text is not None:
+        done["semantic_scoring"] = semantic
+    yield done
+
+def ndjson_response(events):
+    """Stream an async iterator of events as newline-delimited JSON"""
+    async def body():
+        async for event in events:
+            yield json.dumps(event) + "\n"
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+@app.post("/search-jobs/stream")
+async def search_jobs_stream(search_request: JobSearchRequest):
+    """Stream jobs as NDJSON events while the pages of a search arrive"""
+    
+    check_api_configured()
+    return ndjson_response(iter_search_events(search_request))
+
+@app.post("/search-jobs-with-resume/stream")
+async def search_jobs_with_resume_stream(
+    query: str = Query(..., description="Job search query"),
+    resume: UploadFile = File(..., description="Resume file (PDF or TXT)"),
+    page: int = Query(1, description="Page number"),
+    num_pages: int = Query(1, ge=1, le=SEARCH_FANOUT_MAX_PAGES, description="Number of pages"),
+    country: str = Query("ind", description="Country code"),
+    date_posted: str = Query("today", description="Date posted filter")
+):
+    """Stream jobs with resume match scores as NDJSON events while the pages of a search arrive"""
+    
+    check_api_configured()
+    
+    # Read and embed the resume up front, before the upload is closed
+    resume_text = await read_resume_text(resume)
+    resume_embedding = await embed_resume_for_search(resume_text)
+    
+    search_request = JobSearchRequest(
+        query=query,
+        page=page,
+        num_pages=num_pages,
+        country=country,
+        date_posted=date_posted
+    )
+    
+    return ndjson_response(iter_search_events(search_request, resume_text, resume_embedding))
+
+@app.post("/top-jobs-with-resume")
+async def top_jobs_with_resume(
+    resume: UploadFile = File(..., description="Resume file (PDF or TXT)"),
+    k: int = Query(20, ge=1, le=JOB_INDEX_MAX_K, description="Number of jobs to return"),
+    country: Optional[str] = Query(None, description="Only jobs in this country (job_country, e.g. IN)"),
+    is_remote: Optional[bool] = Query(None, description="Only remote (true) or on-site (false) jobs"),
+    employment_type: Optional[str] = Query(None, description="Only this employment type (e.g. FULLTIME)")
+):
+    """Rank every job seen so far against the uploaded resume and return the top K"""
+    
+    job_index = app.state.job_index
+    if job_index is None:
+        raise HTTPException(status_code=503, detail="Job index is disabled")
+    
+    resume_text = await read_resume_text(resume)
+    resume_embedding = await embed_resume(resume_text)
+    if resume_embedding is None:
+        raise HTTPException(status_code=400, detail="No text could be extracted from the resume")
+    
+    # Embedding search picks the candidates, which are then reranked with BM25
+    matches = await asyncio.to_thread(
+        job_index.search,
+        pool_chunks(resume_embedding),
+        k * HYBRID_RERANK_FACTOR,
+        country=country,
+        is_remote=is_remote,
+        employment_type=employment_type
+    )
+    
+    jobs = [job for job, _ in matches]
+    semantic_scores = [round(similarity * 100, 1) for _, similarity in matches]
+    await apply_hybrid_scores(resume_text, jobs, job_features_for(jobs), semantic_scores)
+    jobs = sorted(jobs, key=lambda job: job["match_score"], reverse=True)[:k]
+    
+    return {
+        "status": "success",
+        "total_jobs": len(jobs),
+        "jobs": jobs,
+        "indexed_jobs": len(job_index),
+        "resume_length": len(resume_text),
+        "message": "Top jobs across all indexed postings, ranked by relevance to your resume"
+    }
+
+async def fetch_job_details(job_id, priority=PRIORITY_INTERACTIVE):
+    """Fetch the JSearch details payload for one job and cache it, remembering jobs that do not exist"""
+    response = await jsearch_get("/job-details", {"job_id": job_id}, priority)
+    cache = app.state.job_details_cache
     
-    if not RAPIDAPI_KEY or RAPIDAPI_KEY == "your-rapidapi-key-here":
+    if response.status_code == 404:
+        await cache.set_async(f"job-details:{job_id}", {"error": 404, "detail": f"API request failed: {response.text}"}, JOB_DETAILS_NEGATIVE_TTL)
+    if response.status_code != 200:
         raise HTTPException(
-            status_code=500, 
-            detail="Please set your RAPIDAPI_KEY environment variable"
+            status_code=response.status_code,
+            detail=f"API request failed: {response.text}"
         )
     
-    url = "https://jsearch.p.rapidapi.com/job-details"
+    details = response.json()
+    if not details.get("data"):
+        await cache.set_async(f"job-details:{job_id}", {"error": 404, "detail": "Job not found"}, JOB_DETAILS_NEGATIVE_TTL)
+        raise HTTPException(status_code=404, detail="Job not found")
+    await cache.set_async(f"job-details:{job_id}", details, JOB_DETAILS_CACHE_TTL)
+    return details
+
+async def cached_job_details(job_id, priority=PRIORITY_INTERACTIVE):
+    """Return a job's details from the cache, or fetch them once for all concurrent callers"""
+    cache_key = f"job-details:{job_id}"
+    entry = await app.state.job_details_cache.get_async(cache_key)
+    if entry is not None:
+        if "error" in entry.value:
+            raise HTTPException(status_code=entry.value["error"], detail=entry.value["detail"])
+        return entry.value
     
-    querystring = {"job_id": job_id}
+    try:
+        details = await app.state.single_flight.do(cache_key, lambda: fetch_job_details(job_id, priority))
+    except RateLimitExceeded as e:
+        entry = await stale_cache_entry(app.state.job_details_cache, cache_key)
+        if entry is None:
+            raise rate_limited_error(e)
+        if "error" in entry.value:
+            raise HTTPException(status_code=entry.value["error"], detail=entry.value["detail"])
+        return entry.value
+    return copy.deepcopy(details)
+
+@app.get("/job-details/{job_id}")
+async def get_job_details(job_id: str):
+    """Get detailed information about a specific job"""
     
+    check_api_configured()
+    return await load_job_details(job_id)
+
+async def load_job_details(job_id, priority=PRIORITY_INTERACTIVE):
+    """A job's details with upstream failures turned into HTTP errors"""
     try:
-        headers = get_job_search_headers()
-        response = requests.get(url, headers=headers, params=querystring)
+        # Cached, and concurrent requests for the same job share one upstream call
+        return await cached_job_details(job_id, priority)
         
-        if response.status_code != 200:
+    except HTTPException:
+        raise
+    except httpx.TimeoutException as e:
+        raise HTTPException(status_code=504, detail=f"API request timed out: {str(e)}")
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=500, detail=f"API request error: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+def stage_resume_uploads(uploads, directory):
+    """Copy uploaded resumes, and the PDF/TXT members of uploaded ZIPs, to files in directory
+
+    Files are streamed to disk one at a time so raw resumes are never all held
+    in memory. Returns ((name, path, file_type) per resume, (name, reason) per
+    skipped file).
+    """
+    staged = []
+    skipped = []
+    
+    def stage(name, source, file_type):
+        if len(staged) >= SCREENING_MAX_RESUMES:
             raise HTTPException(
-                status_code=response.status_code,
-                detail=f"API request failed: {response.text}"
+                status_code=400,
+                detail=f"At most {SCREENING_MAX_RESUMES} resumes can be screened at once"
             )
+        path = os.path.join(directory, f"{len(staged)}{os.path.splitext(name)[1].lower()}")
+        if copy_limited(source, path, EXTRACTION_MAX_BYTES):
+            staged.append((name, path, file_type))
+        else:
+            skipped.append((name, f"Larger than {EXTRACTION_MAX_BYTES // (1024 * 1024)} MB"))
+    
+    for upload in uploads:
+        if upload.content_type in ZIP_CONTENT_TYPES or (upload.filename or "").lower().endswith(".zip"):
+            try:
+                with zipfile.ZipFile(upload.file) as archive:
+                    for member in archive.infolist():
+                        name = member.filename
+                        if member.is_dir() or name.startswith("__MACOSX/") or os.path.basename(name).startswith("."):
+                            continue
+                        file_type = resume_file_type(name)
+                        if file_type is None:
+                            skipped.append((name, "Only PDF and TXT files are supported"))
+                            continue
+                        with archive.open(member) as source:
+                            stage(name, source, file_type)
+            except zipfile.BadZipFile:
+                raise HTTPException(status_code=400, detail=f"{upload.filename} is not a valid ZIP archive")
+            continue
         
-        return response.json()
+        file_type = resume_file_type(upload.filename, upload.content_type)
+        if file_type is None:
+            skipped.append((upload.filename, "Only PDF, TXT and ZIP files are supported"))
+            continue
+        stage(upload.filename, upload.file, file_type)
+    
+    return staged, skipped
+
+async def load_screening_jobs(job_ids, search_request):
+    """Return the jobs to screen against and the (job id, reason) of given job ids that could not be loaded
+
+    With no job ids the jobs are the results of a search. A job id that fails
+    or is not found is left out rather than failing the whole screening,
+    unless none of them could be loaded.
+    """
+    if not job_ids:
+        return (await search_jobs(search_request))["jobs"], []
+    
+    semaphore = asyncio.Semaphore(SEARCH_FANOUT_CONCURRENCY)
+    
+    async def fetch(job_id):
+        async with semaphore:
+            details = await get_job_details(job_id)
+        return [format_job(job) for job in details.get("data", [])]
+    
+    results = await asyncio.gather(*[fetch(job_id) for job_id in job_ids], return_exceptions=True)
+    
+    pages = []
+    failed = []
+    for job_id, result in zip(job_ids, results):
+        if isinstance(result, HTTPException):
+            failed.append((job_id, result.detail))
+        elif isinstance(result, Exception):
+            failed.append((job_id, str(result)))
+        elif not result:
+            failed.append((job_id, "Job not found"))
+        else:
+            pages.append(result)
+    
+    if not pages:
+        raise HTTPException(status_code=502, detail=f"None of the job ids could be loaded: {failed[0][1]}")
+    return merge_job_pages(pages), failed
+
+async def iter_screening_events(staged, skipped, jobs, k, directory, skipped_jobs=()):
+    """Parse, embed and score staged resumes against jobs, yielding progress events and the score matrix"""
+    parse_tasks = []
+    try:
+        for name, reason in skipped:
+            yield {"event": "skipped", "name": name, "detail": reason}
+        for job_id, reason in skipped_jobs:
+            yield {"event": "skipped_job", "job_id": job_id, "detail": reason}
         
-    except requests.exceptions.RequestException as e:
-        raise HTTPException(status_code=500, detail=f"API request error: {str(e)}")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+        clean_jobs = clean_job_descriptions(jobs)
+        jobs = [jobs[i] for i, _ in clean_jobs]
+        job_embeddings = await embed_texts([text for _, text in clean_jobs]) if jobs else None
+        yield {"event": "jobs", "total_jobs": len(jobs)}
+        
+        async def parse(index, path, file_type):
+            try:
+                return index, (await app.state.text_extractor.extract_async(path, file_type)).text, None
+            except ExtractionError as e:
+                return index, None, str(e)
+        
+        parse_tasks = [asyncio.ensure_future(parse(i, path, file_type)) for i, (_, path, file_type) in enumerate(staged)]
+        resume_embeddings = {}
+        pending = []
+        parsed = 0
+        
+        async def embed_pending():
+            embeddings = await embed_texts([text for _, text in pending])
+            for (index, _), embedding in zip(pending, embeddings):
+                resume_embeddings[index] = embedding
+            pending.clear()
+        
+        # Embed in batches while the remaining resumes are still being parsed
+        for next_resume in asyncio.as_completed(parse_tasks):
+            index, text, error = await next_resume
+            parsed += 1
+            name = staged[index][0]
+            clean_resume = clean_text(text) if text else ""
+            if error is not None or not clean_resume:
+                yield {"event": "error", "index": index, "name": name, "detail": error or "No text could be extracted"}
+            else:
+                pending.append((index, clean_resume))
+                yield {"event": "resume", "index": index, "name": name, "characters": len(text)}
+            
+            if len(pending) >= SCREENING_EMBED_BATCH_SIZE or (pending and parsed == len(staged)):
+                await embed_pending()
+                yield {"event": "progress", "parsed": parsed, "embedded": len(resume_embeddings), "total_resumes": len(staged)}
+        
+        indexes = sorted(resume_embeddings)
+        if indexes and jobs:
+            embeddings = [resume_embeddings[i] for i in indexes]
+            if not chunking_enabled():
+                embeddings = np.vstack(embeddings)
+            scores = np.round(similarity_scores(embeddings, job_embeddings).astype(np.float64) * 100, 1)
+            best = top_k(scores, k)
+        else:
+            scores = np.zeros((len(indexes), len(jobs)))
+            best = np.zeros((len(indexes), 0), dtype=np.int64)
+        
+        yield {
+            "event": "result",
+            "resumes": [{"index": i, "name": staged[i][0]} for i in indexes],
+            "jobs": [{"job_id": job["job_id"], "job_title": job["job_title"], "employer_name": job["employer_name"]} for job in jobs],
+            "scores": scores.tolist(),
+            "top_matches": [
+                {
+                    "index": i,
+                    "name": staged[i][0],
+                    "matches": [
+                        {"job_id": jobs[j]["job_id"], "job_title": jobs[j]["job_title"], "match_score": float(scores[row, j])}
+                        for j in best[row]
+                    ]
+                }
+                for row, i in enumerate(indexes)
+            ]
+        }
+        yield {"event": "done", "total_resumes": len(indexes), "failed": len(staged) - len(indexes), "total_jobs": len(jobs)}
+    finally:
+        for task in parse_tasks:
+            task.cancel()
+        shutil.rmtree(directory, ignore_errors=True)
+
+@app.post("/screen-resumes")
+async def screen_resumes(
+    resumes: List[UploadFile] = File(..., description="Resume files (PDF or TXT) and/or ZIP archives of them"),
+    job_ids: Optional[str] = Query(None, description="Comma-separated job ids to screen against, instead of a search"),
+    query: Optional[str] = Query(None, description="Job search query, used when no job_ids are given"),
+    page: int = Query(1, description="Page number"),
+    num_pages: int = Query(1, ge=1, le=SEARCH_FANOUT_MAX_PAGES, description="Number of pages"),
+    country: str = Query("ind", description="Country code"),
+    date_posted: str = Query("today", description="Date posted filter"),
+    k: int = Query(10, ge=1, le=SCREENING_MAX_K, description="Top matching jobs to return per resume")
+):
+    """Rank many resumes against a set of jobs, streaming progress and the score matrix as NDJSON events"""
+    
+    check_api_configured()
+    get_embedding_service()
+    
+    ids = [job_id.strip() for job_id in (job_ids or "").split(",") if job_id.strip()]
+    if not ids and not query:
+        raise HTTPException(status_code=400, detail="Pass either job_ids or a search query")
+    if len(ids) > SCREENING_MAX_JOB_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {SCREENING_MAX_JOB_IDS} job ids can be screened at once")
+    
+    search_request = None
+    if not ids:
+        search_request = JobSearchRequest(
+            query=query,
+            page=page,
+            num_pages=num_pages,
+            country=country,
+            date_posted=date_posted
+        )
+    jobs, skipped_jobs = await load_screening_jobs(ids, search_request)
+    
+    # Copy the uploads to disk before the response starts, since they are closed afterwards
+    directory = tempfile.mkdtemp(prefix="screening-")
+    try:
+        staged, skipped = await asyncio.to_thread(stage_resume_uploads, resumes, directory)
+        if not staged:
+            raise HTTPException(status_code=400, detail="No PDF or TXT resumes found in the upload")
+    except BaseException:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+    
+    return ndjson_response(iter_screening_events(staged, skipped, jobs, k, directory, skipped_jobs))
+
+class JobDetailsBatchRequest(BaseModel):
+    job_ids: List[str]
+
+@app.post("/job-details")
+async def get_job_details_batch(batch_request: JobDetailsBatchRequest):
+    """Get details for several jobs at once (e.g. every job on a results page), fetched concurrently"""
+    
+    check_api_configured()
+    
+    job_ids = list(dict.fromkeys(job_id for job_id in batch_request.job_ids if job_id))
+    if len(job_ids) > JOB_DETAILS_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {JOB_DETAILS_BATCH_MAX} job ids per request")
+    
+    semaphore = asyncio.Semaphore(SEARCH_FANOUT_CONCURRENCY)
+    
+    async def fetch(job_id):
+        async with semaphore:
+            # Batches are speculative prefetches, so they yield to searches a user is waiting on
+            return await load_job_details(job_id, PRIORITY_BACKGROUND)
+    
+    results = await asyncio.gather(*[fetch(job_id) for job_id in job_ids], return_exceptions=True)
+    
+    jobs = {}
+    errors = {}
+    for job_id, result in zip(job_ids, results):
+        if isinstance(result, HTTPException):
+            errors[job_id] = result.detail
+        elif isinstance(result, BaseException):
+            errors[job_id] = str(result)
+        else:
+            jobs[job_id] = result
+    
+    return {"status": "success", "jobs": jobs, "errors": errors}
 
 @app.get("/health")
 async def health_check():
@@ -298,7 +1333,21 @@ async def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "api_configured": RAPIDAPI_KEY != "your-rapidapi-key-here"
+        "api_configured": bool(RAPIDAPI_KEYS),
+        "api_keys": app.state.api_keys.stats(),
+        "search_cache": app.state.search_cache.stats(),
+        "job_details_cache": app.state.job_details_cache.stats(),
+        "single_flight": app.state.single_flight.stats(),
+        "rate_limiter": app.state.rate_limiter.stats(),
+        "embedding_model_loaded": app.state.embedding_model is not None,
+        "embedding_backend": EMBEDDING_BACKEND,
+        "embedding_service": app.state.embedding_service.stats() if app.state.embedding_service else None,
+        "embedding_cache": app.state.embedding_cache.stats(),
+        "job_features": app.state.job_features.stats(),
+        "lexical_index": app.state.lexical_index.stats(),
+        "text_extraction": app.state.text_extractor.stats(),
+        "job_index": app.state.job_index.stats() if app.state.job_index else None,
+        "ingestion": app.state.ingestion.stats() if app.state.ingestion else None
     }
 
 if __name__ == "__main__":
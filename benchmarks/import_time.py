@@ -0,0 +1,79 @@
+"""Measure how long importing the Streamlit app takes, and catch heavy imports creeping back in
+
+Runs `python -X importtime -c "import job_with_resume_ui"` in a fresh
+interpreter, prints the slowest top-level imports and exits non-zero when a
+module that should load lazily (torch, sentence_transformers, ...) is
+imported at startup, or the total exceeds --budget-ms.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --budget-ms 1500 --top 15
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed once a resume is scored locally or a PDF is parsed
+DEFERRED_MODULES = ("torch", "sentence_transformers", "transformers", "sklearn", "pandas", "PyPDF2")
+
+
+def import_times(module):
+    """Return (module, self_us, cumulative_us, depth) rows for importing module in a fresh interpreter"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_DIR,
+        capture_output=True,
+        text=True
+    )
+    if completed.returncode != 0:
+        raise SystemExit(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="job_with_resume_ui")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail when the total import time exceeds this")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest direct imports to show")
+    args = parser.parse_args()
+
+    rows = import_times(args.module)
+    # -X importtime lists a module's imports right before the module itself, one level deeper
+    position = max(i for i, row in enumerate(rows) if row[0] == args.module)
+    _, _, total_us, depth = rows[position]
+    direct = []
+    for name, _, cumulative, child_depth in reversed(rows[:position]):
+        if child_depth <= depth:
+            break
+        if child_depth == depth + 1:
+            direct.append((name, cumulative))
+
+    total_ms = total_us / 1000
+    print(f"import {args.module}: {total_ms:.0f} ms")
+    for name, cumulative in sorted(direct, key=lambda row: row[1], reverse=True)[:args.top]:
+        print(f"  {cumulative / 1000:>8.1f} ms  {name}")
+
+    imported = {name.split(".")[0] for name, _, _, _ in rows}
+    eager = [module for module in DEFERRED_MODULES if module in imported]
+    failed = False
+    if eager:
+        print(f"Imported at startup but should be deferred: {', '.join(eager)}")
+        failed = True
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"Over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Compare embedding inference backends: load time, encode latency, throughput, memory and score parity
+
+Each backend runs in its own subprocess so peak RSS is measured per backend.
+Scores of every backend are compared against the fp32 torch scores; the run
+fails when any score drifts more than --max-score-diff percentage points.
+
+    python benchmarks/inference_backends.py
+    python benchmarks/inference_backends.py --backends torch torch-int8 --jobs 256
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from matching import EMBEDDING_BACKENDS, EMBEDDING_MODEL_NAME, encode_texts, load_model, similarity_percentages
+
+SKILLS = [
+    "python", "django", "fastapi", "react", "typescript", "sql", "postgresql", "aws", "docker",
+    "kubernetes", "machine learning", "pytorch", "data analysis", "spark", "airflow", "java",
+    "spring boot", "microservices", "ci cd", "terraform", "product management", "figma", "excel"
+]
+ROLES = ["backend engineer", "data scientist", "frontend developer", "devops engineer", "ml engineer", "analyst"]
+
+
+def sample_texts(num_jobs, seed=0):
+    """Deterministic synthetic resume and job descriptions of realistic length"""
+    rng = random.Random(seed)
+
+    def document(role):
+        sentences = []
+        for _ in range(rng.randint(6, 14)):
+            skills = rng.sample(SKILLS, 3)
+            sentences.append(f"experience as a {role} working with {skills[0]}, {skills[1]} and {skills[2]}")
+        return ". ".join(sentences)
+
+    resume = document(rng.choice(ROLES))
+    jobs = [document(rng.choice(ROLES)) for _ in range(num_jobs)]
+    return resume, jobs
+
+
+def run_backend(backend, model_name, num_jobs, batch_size, repeats):
+    """Runs in the worker subprocess: measure one backend and return its numbers and scores"""
+    resume, jobs = sample_texts(num_jobs)
+
+    started = time.perf_counter()
+    model = load_model(model_name, backend)
+    load_seconds = time.perf_counter() - started
+
+    # Warm up once so lazy initialization is not counted as encode latency
+    encode_texts(jobs[:batch_size], model, batch_size)
+
+    single_latencies = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        encode_texts([resume], model, 1)
+        single_latencies.append(time.perf_counter() - started)
+
+    batch_seconds = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        job_embeddings = encode_texts(jobs, model, batch_size)
+        batch_seconds.append(time.perf_counter() - started)
+
+    resume_embedding = encode_texts([resume], model, 1)[0]
+    return {
+        "backend": backend,
+        "load_seconds": round(load_seconds, 2),
+        "single_ms": round(min(single_latencies) * 1000, 1),
+        "texts_per_second": round(num_jobs / min(batch_seconds), 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "scores": similarity_percentages(resume_embedding, job_embeddings)
+    }
+
+
+def measure(backend, args):
+    """Run one backend in a fresh interpreter and parse its JSON result"""
+    command = [
+        sys.executable, os.path.abspath(__file__),
+        "--worker", backend,
+        "--model", args.model,
+        "--jobs", str(args.jobs),
+        "--batch-size", str(args.batch_size),
+        "--repeats", str(args.repeats)
+    ]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        return {"backend": backend, "error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "failed"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def top_k_overlap(scores, reference, k):
+    top = set(sorted(range(len(scores)), key=scores.__getitem__, reverse=True)[:k])
+    reference_top = set(sorted(range(len(reference)), key=reference.__getitem__, reverse=True)[:k])
+    return len(top & reference_top) / k
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS), choices=EMBEDDING_BACKENDS)
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME)
+    parser.add_argument("--jobs", type=int, default=128, help="Number of job descriptions to encode")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--max-score-diff", type=float, default=2.0, help="Allowed drift from fp32, in percentage points")
+    parser.add_argument("--worker", choices=EMBEDDING_BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_backend(args.worker, args.model, args.jobs, args.batch_size, args.repeats)))
+        return
+
+    backends = ["torch"] + [backend for backend in args.backends if backend != "torch"]
+    results = [measure(backend, args) for backend in backends]
+    reference = results[0].get("scores")
+    k = min(10, args.jobs)
+
+    print(f"{'backend':<12}{'load s':>8}{'1 text ms':>11}{'texts/s':>10}{'peak MB':>10}{'max diff':>10}{'top-' + str(k):>8}")
+    failed = False
+    for result in results:
+        if "error" in result:
+            print(f"{result['backend']:<12}  error: {result['error']}")
+            failed = failed or result["backend"] == "torch"
+            continue
+        max_diff = top_overlap = None
+        if reference is not None:
+            max_diff = round(max(abs(a - b) for a, b in zip(result["scores"], reference)), 2)
+            top_overlap = top_k_overlap(result["scores"], reference, k)
+            failed = failed or max_diff > args.max_score_diff
+        print(
+            f"{result['backend']:<12}{result['load_seconds']:>8}{result['single_ms']:>11}"
+            f"{result['texts_per_second']:>10}{result['peak_rss_mb']:>10}"
+            f"{max_diff if max_diff is not None else '-':>10}{top_overlap if top_overlap is not None else '-':>8}"
+        )
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
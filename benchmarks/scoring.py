@@ -0,0 +1,126 @@
+"""Micro-benchmark resume-to-job scoring: per-pair sklearn cosine_similarity vs one normalized matmul
+
+Uses random unit vectors of the model's dimension, so no model is loaded.
+The per-pair path is how jobs used to be scored (one cosine_similarity call
+on 1x384 arrays per job); it is skipped when scikit-learn is not installed.
+BM25 scoring is timed on synthetic Zipf-distributed documents, against a
+per-job Python loop over token counts.
+
+    python benchmarks/scoring.py
+    python benchmarks/scoring.py --jobs 5000 --resumes 50 --dim 384
+"""
+import argparse
+import math
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexical_index import LexicalIndex
+from matching import normalize, similarity_matrix, top_k
+
+
+def best_seconds(fn, repeats, number):
+    return min(timeit.repeat(fn, repeat=repeats, number=number)) / number
+
+
+def report(label, seconds, baseline=None):
+    speedup = f"{baseline / seconds:>9.1f}x" if baseline else ""
+    print(f"  {label:<38}{seconds * 1000:>10.3f} ms{speedup}")
+
+
+def synthetic_documents(rng, count, vocabulary_size=20_000, min_tokens=100, max_tokens=600):
+    """{token: count} documents whose word frequencies follow Zipf's law, like real text"""
+    weights = 1 / np.arange(1, vocabulary_size + 1)
+    weights /= weights.sum()
+    documents = []
+    for length in rng.integers(min_tokens, max_tokens, size=count):
+        ids, counts = np.unique(rng.choice(vocabulary_size, size=length, p=weights), return_counts=True)
+        documents.append({f"t{i}": int(c) for i, c in zip(ids, counts)})
+    return documents
+
+
+def bm25_loop(query, documents, k1=1.2, b=0.75):
+    """Textbook BM25 with one dict lookup per query term per job"""
+    df = {}
+    for document in documents:
+        for token in document:
+            df[token] = df.get(token, 0) + 1
+    average_length = sum(sum(document.values()) for document in documents) / len(documents)
+    scores = []
+    for document in documents:
+        length = sum(document.values())
+        score = 0.0
+        for token in query:
+            tf = document.get(token)
+            if tf:
+                idf = math.log1p((len(documents) - df[token] + 0.5) / (df[token] + 0.5))
+                score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / average_length))
+        scores.append(score)
+    return scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=1000)
+    parser.add_argument("--resumes", type=int, default=20)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    jobs = normalize(rng.standard_normal((args.jobs, args.dim)))
+    resumes = normalize(rng.standard_normal((args.resumes, args.dim)))
+    resume = resumes[0]
+
+    try:
+        from sklearn.metrics.pairwise import cosine_similarity
+    except ImportError:
+        cosine_similarity = None
+
+    print(f"1 resume x {args.jobs} jobs")
+    baseline = None
+    if cosine_similarity is not None:
+        per_pair = lambda: [cosine_similarity([resume], [job])[0][0] for job in jobs]
+        baseline = best_seconds(per_pair, args.repeats, 1)
+        report("sklearn cosine_similarity per job", baseline)
+        batched = lambda: cosine_similarity(resume[None, :], jobs)[0]
+        report("sklearn cosine_similarity batched", best_seconds(batched, args.repeats, 10), baseline)
+        assert np.allclose(per_pair(), similarity_matrix(resume, jobs)[0], atol=1e-5)
+    report("similarity_matrix", best_seconds(lambda: similarity_matrix(resume, jobs), args.repeats, 100), baseline)
+
+    print(f"{args.resumes} resumes x {args.jobs} jobs")
+    baseline = None
+    if cosine_similarity is not None:
+        baseline = best_seconds(lambda: cosine_similarity(resumes, jobs), args.repeats, 10)
+        report("sklearn cosine_similarity", baseline)
+    report("similarity_matrix", best_seconds(lambda: similarity_matrix(resumes, jobs), args.repeats, 100), baseline)
+
+    print(f"top {args.k} per resume")
+    scores = similarity_matrix(resumes, jobs)
+    baseline = best_seconds(lambda: np.argsort(-scores, axis=1)[:, :args.k], args.repeats, 100)
+    report("full argsort", baseline)
+    report("top_k (argpartition)", best_seconds(lambda: top_k(scores, args.k), args.repeats, 100), baseline)
+    assert np.array_equal(np.sort(top_k(scores, args.k), axis=1), np.sort(np.argsort(-scores, axis=1)[:, :args.k], axis=1))
+
+    print(f"BM25, 1 resume x {args.jobs} jobs")
+    documents = synthetic_documents(rng, args.jobs)
+    query = list(synthetic_documents(rng, 1)[0])
+    job_ids = [str(i) for i in range(args.jobs)]
+    index = LexicalIndex()
+    for job_id, document in zip(job_ids, documents):
+        index.add(job_id, "", document)
+    index.merge()
+    baseline = best_seconds(lambda: bm25_loop(query, documents), args.repeats, 1)
+    report("per-job Python loop", baseline)
+    report("LexicalIndex.score", best_seconds(lambda: index.score(query, job_ids, keywords=0), args.repeats, 10), baseline)
+    report("LexicalIndex.score + keywords", best_seconds(lambda: index.score(query, job_ids), args.repeats, 10), baseline)
+    assert np.allclose(index.score(query, job_ids, keywords=0)[0], bm25_loop(query, documents), rtol=1e-4, atol=1e-4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import hashlib
+import os
+import threading
+import time
+
+import numpy as np
+
+from sqlite_db import connect_shared
+
+# Default on-disk location, shared by every process that scores jobs
+DEFAULT_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(".cache", "embeddings.sqlite3"))
+DEFAULT_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+
+
+class EmbeddingCache:
+    """Content-addressed embedding store backed by SQLite with LRU eviction
+
+    Entries are keyed by a hash of the model name and the cleaned text, so the
+    same posting returned across users, pages and filters is only embedded once.
+    The database runs in WAL mode, which lets several Streamlit or API worker
+    processes read and write the same file concurrently.
+    """
+
+    def __init__(self, model_name, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        self.model_name = model_name
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self._conn = connect_shared(path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings (last_access)")
+        self._conn.commit()
+
+    def key_for(self, text):
+        """Build the cache key for a cleaned text under this cache's model"""
+        digest = hashlib.sha256()
+        digest.update(self.model_name.encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get_many(self, texts):
+        """Return a {position: embedding} dict for the texts that are already cached"""
+        keys = [self.key_for(text) for text in texts]
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, dim, vector FROM embeddings WHERE key IN ({placeholders})",
+                    chunk
+                ).fetchall()
+                for key, dim, vector in rows:
+                    found[key] = np.frombuffer(vector, dtype=np.float32, count=dim)
+
+            # Refresh recency for hits so eviction drops the least recently used rows
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+
+            self.hits += sum(1 for key in keys if key in found)
+            self.misses += sum(1 for key in keys if key not in found)
+
+        return {i: found[key] for i, key in enumerate(keys) if key in found}
+
+    def put_many(self, texts, embeddings):
+        """Store embeddings for the given texts and evict the oldest rows past the size bound"""
+        now = time.time()
+        rows = []
+        for text, embedding in zip(texts, embeddings):
+            vector = np.ascontiguousarray(embedding, dtype=np.float32)
+            rows.append((self.key_for(text), vector.shape[0], vector.tobytes(), now))
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, dim, vector, last_access) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            overflow = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    """
+                    DELETE FROM embeddings WHERE key IN (
+                        SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?
+                    )
+                    """,
+                    (overflow,)
+                )
+            self._conn.commit()
+
+    def encode(self, texts, encode_fn):
+        """Return embeddings for texts, calling encode_fn only on the ones not cached yet"""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        cached = self.get_many(texts)
+        missing = [i for i in range(len(texts)) if i not in cached]
+
+        if missing:
+            new_embeddings = np.asarray(encode_fn([texts[i] for i in missing]), dtype=np.float32)
+            self.put_many([texts[i] for i in missing], new_embeddings)
+            cached.update(zip(missing, new_embeddings))
+
+        return np.vstack([cached[i] for i in range(len(texts))]).astype(np.float32, copy=False)
+
+    def stats(self):
+        """Return hit/miss counters for this process and the current number of stored entries"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries
+        }
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
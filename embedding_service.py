@@ -0,0 +1,160 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from matching import ENCODE_BATCH_SIZE, chunk_texts, encode_texts
+
+
+def set_torch_threads(num_threads):
+    """Pin the number of intra-op threads torch uses for inference (0 keeps torch's default)"""
+    if not num_threads:
+        return
+    try:
+        import torch
+        torch.set_num_threads(num_threads)
+    except ImportError:
+        pass
+
+
+class EmbeddingService:
+    """Micro-batching encoder shared by every request handler of a worker
+
+    Handlers call encode() with their own texts. Requests are queued, and a
+    batching loop packs whatever is waiting into one batch bounded by
+    max_batch_size texts and max_wait_ms of extra waiting. Each batch is run
+    on a thread pool, so the event loop never runs inference. While all
+    workers are busy, new requests pile up and the next batch gets larger,
+    which is where throughput under load comes from.
+
+    chunk() tokenizes documents for chunking on a thread of its own, with
+    the private tokenizer copy chunk_texts keeps per model (sharing the
+    model's with a running encode fails with "Already borrowed").
+    """
+
+    def __init__(self, model, embedding_cache=None, max_batch_size=64, max_wait_ms=5, workers=1, torch_threads=0, encode_batch_size=ENCODE_BATCH_SIZE):
+        self.model = model
+        self.embedding_cache = embedding_cache
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.workers = workers
+        self.encode_batch_size = encode_batch_size
+        self.batches = 0
+        self.texts_encoded = 0
+        self.requests = 0
+
+        set_torch_threads(torch_threads)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embedding")
+        self._chunk_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chunking")
+        self._queue = None
+        self._slots = None
+        self._batcher = None
+        # Running batches, referenced so they are not garbage collected mid-encode
+        self._batch_tasks = set()
+
+    async def start(self):
+        """Start the batching loop on the running event loop"""
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.workers)
+        self._batcher = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop batching, fail anything queued or encoding and release the worker threads"""
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+        for task in self._batch_tasks:
+            task.cancel()
+        await asyncio.gather(*self._batch_tasks, return_exceptions=True)
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Embedding service stopped"))
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._chunk_executor.shutdown(wait=False, cancel_futures=True)
+
+    async def encode(self, texts):
+        """Return unit-normalized float32 embeddings for already-cleaned texts"""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        future = asyncio.get_running_loop().create_future()
+        self.requests += 1
+        self._queue.put_nowait((list(texts), future))
+        return await future
+
+    async def chunk(self, texts):
+        """Split cleaned texts into chunks, returning the flat chunk list and each text's (start, end) slice"""
+        return await asyncio.get_running_loop().run_in_executor(self._chunk_executor, chunk_texts, texts, self.model)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Wait for a free worker first so requests keep accumulating while all are busy
+            await self._slots.acquire()
+            try:
+                batch = [await self._queue.get()]
+            except asyncio.CancelledError:
+                self._slots.release()
+                raise
+
+            size = len(batch[0][0])
+            deadline = loop.time() + self.max_wait
+            while size < self.max_batch_size:
+                if self._queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = self._queue.get_nowait()
+                batch.append(item)
+                size += len(item[0])
+
+            task = asyncio.create_task(self._encode_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _encode_batch(self, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            # Encode each distinct text once, even when several requests share it
+            unique_texts = list(dict.fromkeys(text for texts, _ in batch for text in texts))
+            embeddings = await loop.run_in_executor(self._executor, self._encode_sync, unique_texts)
+            rows = {text: embeddings[i] for i, text in enumerate(unique_texts)}
+            self.batches += 1
+            self.texts_encoded += len(unique_texts)
+            for texts, future in batch:
+                if not future.done():
+                    future.set_result(np.vstack([rows[text] for text in texts]))
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        except asyncio.CancelledError:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("Embedding service stopped"))
+            raise
+        finally:
+            self._slots.release()
+
+    def _encode_sync(self, texts):
+        """Runs on a worker thread: cache lookups plus one forward pass for the misses"""
+        if self.embedding_cache is not None:
+            return self.embedding_cache.encode(texts, lambda missing: encode_texts(missing, self.model, self.encode_batch_size))
+        return encode_texts(texts, self.model, self.encode_batch_size)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "texts_encoded": self.texts_encoded,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "avg_batch_texts": round(self.texts_encoded / self.batches, 2) if self.batches else 0.0
+        }
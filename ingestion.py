@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, every worker ingests
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionScheduler:
+    """Background loop that keeps a fixed set of searches warm
+
+    Every interval it calls refresh(search) for each configured search (which
+    fetches it upstream, refreshes the response cache and indexes new or
+    changed postings) and then expire() to drop postings that are too old.
+    One failing search is logged and does not stop the others.
+
+    With a lock_path only the worker process holding an exclusive lock on
+    that file ingests; the others retry the lock every interval, so one of
+    them takes over if the ingesting worker exits.
+    """
+
+    def __init__(self, searches, refresh, interval_seconds, expire=None, lock_path=None):
+        self.searches = list(searches)
+        self.refresh = refresh
+        self.interval_seconds = interval_seconds
+        self.expire = expire
+        self.runs = 0
+        self.errors = 0
+        self.jobs_indexed = 0
+        self.jobs_expired = 0
+        self.last_run_at = None
+        self.last_run_seconds = None
+        self.lock_path = lock_path
+        self._lock_file = None
+        self._task = None
+
+    @property
+    def leader(self):
+        """Whether this worker is the one that ingests"""
+        return self.lock_path is None or fcntl is None or self._lock_file is not None
+
+    def _acquire_lock(self):
+        """Try to take the ingestion lock without blocking; True once this worker holds it"""
+        if self.leader:
+            return True
+        directory = os.path.dirname(self.lock_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        lock_file = open(self.lock_path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        logger.info("Ingestion lock %s acquired by pid %s", self.lock_path, os.getpid())
+        return True
+
+    async def start(self):
+        """Start refreshing in the background, beginning right away"""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._lock_file is not None:
+            # Closing the file releases the lock for another worker
+            self._lock_file.close()
+            self._lock_file = None
+
+    async def run_once(self):
+        """Refresh every configured search once, then expire stale postings"""
+        started = time.time()
+        for search in self.searches:
+            try:
+                self.jobs_indexed += await self.refresh(search) or 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.warning("Ingestion refresh failed for %s: %s", search, e)
+
+        if self.expire is not None:
+            try:
+                self.jobs_expired += await self.expire() or 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.warning("Ingestion expiry failed: %s", e)
+
+        self.runs += 1
+        self.last_run_at = started
+        self.last_run_seconds = round(time.time() - started, 2)
+
+    async def _run(self):
+        while True:
+            if self._acquire_lock():
+                await self.run_once()
+            await asyncio.sleep(self.interval_seconds)
+
+    def stats(self):
+        return {
+            "leader": self.leader,
+            "searches": len(self.searches),
+            "interval_seconds": self.interval_seconds,
+            "runs": self.runs,
+            "errors": self.errors,
+            "jobs_indexed": self.jobs_indexed,
+            "jobs_expired": self.jobs_expired,
+            "last_run_at": self.last_run_at,
+            "last_run_seconds": self.last_run_seconds
+        }
@@ -0,0 +1,128 @@
+import re
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from job_index import content_hash, parse_posted_at
+from matching import clean_text
+
+# Multipliers that turn a salary quoted per period into a yearly figure
+SALARY_PERIOD_YEARLY = {
+    "HOUR": 2080,
+    "DAY": 260,
+    "WEEK": 52,
+    "MONTH": 12,
+    "YEAR": 1
+}
+SALARY_AMOUNT = re.compile(r"(\d[\d,]*(?:\.\d+)?)\s*([kKmM])?")
+SALARY_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+# Words, keeping inner dots and hyphens ("node.js", "full-stack") but not trailing punctuation
+TOKEN = re.compile(r"\w+(?:[\-\.]\w+)*")
+
+
+@dataclass(frozen=True)
+class JobFeatures:
+    """Text and attribute features of one posting, computed once when it is fetched"""
+    job_id: str
+    source_hash: str
+    clean_text: str
+    token_counts: dict
+    salary_min: Optional[float]
+    salary_max: Optional[float]
+    posted_at: Optional[float]
+
+
+def tokenize(text):
+    """Split already-cleaned text into the words used for keyword matching"""
+    return TOKEN.findall(text)
+
+
+def parse_salary(job):
+    """Return the (min, max) yearly salary of a job, or (None, None) when it is not given"""
+    period = (job.get("job_salary_period") or "YEAR").upper()
+    yearly = SALARY_PERIOD_YEARLY.get(period, 1)
+    low, high = job.get("job_min_salary"), job.get("job_max_salary")
+
+    # Fall back to amounts written in the free-text salary ("$50K - $70K a year")
+    if low is None and high is None and job.get("job_salary"):
+        amounts = [
+            float(number.replace(",", "")) * SALARY_SUFFIXES.get((suffix or "").lower(), 1)
+            for number, suffix in SALARY_AMOUNT.findall(str(job["job_salary"]))
+        ]
+        if amounts:
+            low, high = min(amounts), max(amounts)
+
+    low = float(low) * yearly if low is not None else None
+    high = float(high) * yearly if high is not None else low
+    return (low if low is not None else high), high
+
+
+def job_source_hash(job):
+    """Hash of the fields features are computed from, to notice when a posting changes"""
+    return content_hash("\x00".join(str(job.get(field) or "") for field in (
+        "job_title", "job_description", "job_posted_at", "job_salary", "job_min_salary", "job_max_salary", "job_salary_period"
+    )))
+
+
+def build_job_features(job, now=None):
+    """Compute the feature record of a formatted job"""
+    description = job.get("job_description") or ""
+    clean_description = clean_text(description)
+    tokens = tokenize(clean_text(f"{description} {job.get('job_title') or ''}"))
+    salary_min, salary_max = parse_salary(job)
+    return JobFeatures(
+        job_id=job.get("job_id") or "",
+        source_hash=job_source_hash(job),
+        clean_text=clean_description,
+        token_counts=dict(Counter(tokens)),
+        salary_min=salary_min,
+        salary_max=salary_max,
+        posted_at=parse_posted_at(job.get("job_posted_at"), now)
+    )
+
+
+class JobFeatureStore:
+    """LRU cache of job feature records keyed by job_id
+
+    Features are built when a search response is formatted and looked up by
+    everything downstream (matching, keyword overlap, indexing, screening),
+    so text is cleaned and tokenized once per posting rather than per request.
+    A posting whose fields changed since it was cached is rebuilt.
+    """
+
+    def __init__(self, max_entries=50_000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.builds = 0
+        self._features = OrderedDict()
+
+    def features_for(self, jobs, now=None):
+        """Return the feature record of each job, building and caching the ones not seen yet"""
+        now = time.time() if now is None else now
+        features = []
+        for job in jobs:
+            job_id = job.get("job_id")
+            cached = self._features.get(job_id) if job_id else None
+            if cached is not None and cached.source_hash == job_source_hash(job):
+                self._features.move_to_end(job_id)
+                self.hits += 1
+                features.append(cached)
+                continue
+
+            built = build_job_features(job, now)
+            self.builds += 1
+            if job_id:
+                self._features[job_id] = built
+                self._features.move_to_end(job_id)
+                while len(self._features) > self.max_entries:
+                    self._features.popitem(last=False)
+            features.append(built)
+        return features
+
+    def __len__(self):
+        return len(self._features)
+
+    def stats(self):
+        return {"entries": len(self._features), "max_entries": self.max_entries, "hits": self.hits, "builds": self.builds}
@@ -0,0 +1,340 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from matching import top_k
+from sqlite_db import connect_shared
+
+# Default location of the job corpus (SQLite metadata + raw float32 embedding matrix)
+DEFAULT_INDEX_DIR = os.getenv("JOB_INDEX_DIR", os.path.join(".cache", "job_index"))
+
+# Rows scored per block during search; keeps the working set in cache while streaming the mmap
+SEARCH_BLOCK_ROWS = 65536
+
+# Seconds per unit in relative posting dates such as "3 days ago"
+RELATIVE_UNITS = {
+    "minute": 60,
+    "hour": 60 * 60,
+    "day": 24 * 60 * 60,
+    "week": 7 * 24 * 60 * 60,
+    "month": 30 * 24 * 60 * 60
+}
+
+
+def content_hash(text):
+    """Hash of the cleaned text a job was embedded from, used to detect changed postings"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def index_directory(base_directory, model_key):
+    """Directory of the corpus for one embedding model, so vectors of different models never share a matrix"""
+    return os.path.join(base_directory, re.sub(r"[^A-Za-z0-9._-]+", "_", model_key))
+
+
+def parse_posted_at(value, now=None):
+    """Parse a job_posted_at value (epoch, ISO 8601 or "3 days ago") into an epoch timestamp, or None"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    text = str(value).strip().lower()
+    if text.isdigit():
+        return float(text)
+    try:
+        parsed = datetime.fromisoformat(text.upper().replace("Z", "+00:00"))
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+    except ValueError:
+        pass
+
+    now = time.time() if now is None else now
+    if text in ("just now", "today"):
+        return now
+    if text == "yesterday":
+        return now - RELATIVE_UNITS["day"]
+    match = re.match(r"^(\d+|an?)\+?\s+(minute|hour|day|week|month)s?\s+ago$", text)
+    if match:
+        amount = 1 if match.group(1) in ("a", "an") else int(match.group(1))
+        return now - amount * RELATIVE_UNITS[match.group(2)]
+    return None
+
+
+class JobIndex:
+    """Persistent corpus of every job we have fetched, with exact blocked top-K search
+
+    Job fields live in SQLite; embeddings live in a raw float32 file where the
+    embedding of SQLite row N sits at matrix row N - 1, and are searched through
+    a read-only memory map. A row's embedding is written before its SQLite row
+    commits, so readers in other worker processes only ever see complete rows.
+    Filterable attributes are mirrored into NumPy arrays so filters are
+    vectorized masks rather than SQL queries.
+    """
+
+    def __init__(self, directory=DEFAULT_INDEX_DIR, model_key=None):
+        self.directory = directory
+        self.model_key = model_key
+        self._lock = threading.Lock()
+
+        self._conn = connect_shared(os.path.join(directory, "jobs.sqlite3"))
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                row INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL UNIQUE,
+                data TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                country TEXT NOT NULL,
+                is_remote INTEGER NOT NULL,
+                employment_type TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                posted_at REAL NOT NULL DEFAULT 0,
+                active INTEGER NOT NULL DEFAULT 1
+            )
+            """
+        )
+        # Indexes created before expiry support lack the posted_at/active columns
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "posted_at" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN posted_at REAL NOT NULL DEFAULT 0")
+            self._conn.execute("UPDATE jobs SET posted_at = updated_at")
+        if "active" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN active INTEGER NOT NULL DEFAULT 1")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_updated_at ON jobs (updated_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_posted_at ON jobs (posted_at)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        if model_key is not None:
+            self._conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('model_key', ?)", (model_key,))
+            stored = self._conn.execute("SELECT value FROM meta WHERE key = 'model_key'").fetchone()[0]
+            if stored != model_key:
+                self._conn.close()
+                raise ValueError(f"Job index in {directory} holds {stored} embeddings, not {model_key}")
+        self._conn.commit()
+
+        self._embeddings_path = os.path.join(directory, "embeddings.f32")
+        self._fd = os.open(self._embeddings_path, os.O_RDWR | os.O_CREAT, 0o644)
+        self.dim = self._load_dim()
+
+        # Per-row mirrors of the filterable columns (position = row - 1)
+        self._rows = 0
+        self._active = np.zeros(0, dtype=bool)
+        self._remote = np.zeros(0, dtype=np.int8)
+        self._country = np.zeros(0, dtype=np.int32)
+        self._employment_type = np.zeros(0, dtype=np.int32)
+        self._country_codes = {}
+        self._employment_codes = {}
+        self._last_refresh = 0.0
+        self._matrix = None
+        self._matrix_rows = 0
+        self.refresh()
+
+    def _load_dim(self):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        return int(row[0]) if row else None
+
+    def _code(self, codes, value):
+        if value not in codes:
+            codes[value] = len(codes) + 1
+        return codes[value]
+
+    def _ensure_capacity(self, rows):
+        capacity = len(self._active)
+        if rows <= capacity:
+            return
+        new_capacity = max(rows, capacity * 2, 1024)
+        for name in ("_active", "_remote", "_country", "_employment_type"):
+            old = getattr(self, name)
+            grown = np.zeros(new_capacity, dtype=old.dtype)
+            grown[:capacity] = old
+            setattr(self, name, grown)
+
+    def refresh(self):
+        """Pick up rows written since the last refresh, including ones written by other processes"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT row, country, is_remote, employment_type, updated_at, active FROM jobs WHERE updated_at >= ?",
+                (self._last_refresh,)
+            ).fetchall()
+            if self.dim is None:
+                self.dim = self._load_dim()
+            for row, country, is_remote, employment_type, updated_at, active in rows:
+                position = row - 1
+                self._ensure_capacity(row)
+                self._active[position] = bool(active)
+                self._remote[position] = is_remote
+                self._country[position] = self._code(self._country_codes, country)
+                self._employment_type[position] = self._code(self._employment_codes, employment_type)
+                self._rows = max(self._rows, row)
+                self._last_refresh = max(self._last_refresh, updated_at)
+
+    def _embeddings(self):
+        """Read-only memory map over the first self._rows embeddings (the caller holds the lock)"""
+        if self._matrix is None or self._matrix_rows != self._rows:
+            self._matrix = np.memmap(self._embeddings_path, dtype=np.float32, mode="r", shape=(self._rows, self.dim))
+            self._matrix_rows = self._rows
+        return self._matrix
+
+    def changed(self, jobs, texts):
+        """Return the positions of jobs that are new, changed or expired, i.e. that need embedding"""
+        job_ids = [job.get("job_id") for job in jobs]
+        known = {}
+        with self._lock:
+            ids = [job_id for job_id in job_ids if job_id]
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                known.update(
+                    (job_id, (digest, active))
+                    for job_id, digest, active in self._conn.execute(
+                        f"SELECT job_id, content_hash, active FROM jobs WHERE job_id IN ({placeholders})",
+                        chunk
+                    )
+                )
+        return [
+            i for i, (job_id, text) in enumerate(zip(job_ids, texts))
+            if job_id and known.get(job_id) != (content_hash(text), 1)
+        ]
+
+    def expire(self, posted_before):
+        """Deactivate jobs posted before the given epoch timestamp; returns how many were expired"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET active = 0, updated_at = ? WHERE active = 1 AND posted_at < ?",
+                (time.time(), posted_before)
+            )
+            self._conn.commit()
+            expired = cursor.rowcount
+        self.refresh()
+        return expired
+
+    def upsert_many(self, jobs, texts, embeddings):
+        """Insert new jobs or overwrite changed ones; returns the number of rows written"""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if embeddings.ndim != 2:
+            raise ValueError(f"Expected one embedding per job, got an array of shape {embeddings.shape}")
+        written = 0
+        with self._lock:
+            if self.dim is None:
+                self.dim = embeddings.shape[1]
+                self._conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('dim', ?)", (str(self.dim),))
+            if embeddings.shape[1] != self.dim:
+                # A wider vector would spill into the next row of the matrix
+                raise ValueError(f"Embeddings have {embeddings.shape[1]} dimensions, the index holds {self.dim}")
+            for job, text, embedding in zip(jobs, texts, embeddings):
+                job_id = job.get("job_id")
+                if not job_id:
+                    continue
+                digest = content_hash(text)
+                existing = self._conn.execute(
+                    "SELECT row, content_hash, active FROM jobs WHERE job_id = ?",
+                    (job_id,)
+                ).fetchone()
+                if existing and existing[1] == digest and existing[2]:
+                    continue
+
+                now = time.time()
+                values = (
+                    json.dumps(job),
+                    digest,
+                    (job.get("job_country") or "").lower(),
+                    1 if job.get("job_is_remote") else 0,
+                    (job.get("job_employment_type") or "").lower(),
+                    now,
+                    parse_posted_at(job.get("job_posted_at"), now) or now
+                )
+                if existing:
+                    row = existing[0]
+                    self._conn.execute(
+                        "UPDATE jobs SET data = ?, content_hash = ?, country = ?, is_remote = ?, employment_type = ?, updated_at = ?, posted_at = ?, active = 1 WHERE row = ?",
+                        values + (row,)
+                    )
+                else:
+                    cursor = self._conn.execute(
+                        "INSERT INTO jobs (job_id, data, content_hash, country, is_remote, employment_type, updated_at, posted_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (job_id,) + values
+                    )
+                    row = cursor.lastrowid
+
+                # Write the embedding before the row commits so readers never see a half-written row
+                os.pwrite(self._fd, np.ascontiguousarray(embedding).tobytes(), (row - 1) * self.dim * 4)
+                written += 1
+            if written:
+                os.fsync(self._fd)
+            self._conn.commit()
+        self.refresh()
+        return written
+
+    def _filter_mask(self, rows, country=None, is_remote=None, employment_type=None):
+        """Rows among the first `rows` that are active and match the filters (the caller holds the lock)"""
+        mask = self._active[:rows].copy()
+        if country:
+            code = self._country_codes.get(country.lower())
+            mask &= self._country[:rows] == (code or -1)
+        if is_remote is not None:
+            mask &= self._remote[:rows] == (1 if is_remote else 0)
+        if employment_type:
+            code = self._employment_codes.get(employment_type.lower())
+            mask &= self._employment_type[:rows] == (code or -1)
+        return mask
+
+    def search(self, query_embedding, k=20, country=None, is_remote=None, employment_type=None):
+        """Return up to k (job, cosine similarity) pairs, best first, matching the filters"""
+        self.refresh()
+
+        # Snapshot the row count, matrix and mask together: upsert_many may grow them on another thread
+        with self._lock:
+            rows = self._rows
+            if not rows or self.dim is None or k <= 0:
+                return []
+            matrix = self._embeddings()
+            mask = self._filter_mask(rows, country, is_remote, employment_type)
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        best_rows = np.zeros(0, dtype=np.int64)
+        best_scores = np.zeros(0, dtype=np.float32)
+        for start in range(0, rows, SEARCH_BLOCK_ROWS):
+            end = min(start + SEARCH_BLOCK_ROWS, rows)
+            block_mask = mask[start:end]
+            if not block_mask.any():
+                continue
+            scores = matrix[start:end] @ query
+            scores[~block_mask] = -np.inf
+
+            # Keep the block's top-k, then merge with the running top-k
+            top = top_k(scores, k)
+            best_rows = np.concatenate([best_rows, top + start])
+            best_scores = np.concatenate([best_scores, scores[top]])
+            keep = top_k(best_scores, k)
+            best_rows = best_rows[keep]
+            best_scores = best_scores[keep]
+
+        ranked = [(int(row) + 1, float(score)) for row, score in zip(best_rows, best_scores) if np.isfinite(score)]
+        if not ranked:
+            return []
+
+        with self._lock:
+            placeholders = ",".join("?" * len(ranked))
+            data = dict(self._conn.execute(
+                f"SELECT row, data FROM jobs WHERE row IN ({placeholders})",
+                [row for row, _ in ranked]
+            ).fetchall())
+        return [(json.loads(data[row]), score) for row, score in ranked if row in data]
+
+    def __len__(self):
+        with self._lock:
+            return int(self._active[:self._rows].sum())
+
+    def stats(self):
+        return {"jobs": len(self), "rows": self._rows, "dim": self.dim}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+            os.close(self._fd)
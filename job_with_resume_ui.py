@@ -1,14 +1,14 @@
 import streamlit as st
 import requests
 import json
-from datetime import datetime
-import pandas as pd
-from sentence_transformers import SentenceTransformer
-import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-import PyPDF2
-import io
-import re
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import os
+from api_client import ApiClient
+from embedding_cache import EmbeddingCache
+from matching import EMBEDDING_MODEL_NAME, embedding_model_key, encode_resume, load_model, score_texts
+from text_extraction import ExtractionError, TextExtractor, spool_to_file
 
 # Set page config
 st.set_page_config(
@@ -142,67 +142,149 @@ st.markdown("""
 # API base URL - change this to your FastAPI server URL
 API_BASE_URL = "http://localhost:8000"
 
+# Render job cards incrementally from the streaming search endpoint
+STREAM_RESULTS = True
+
+# Where resume match scores are computed: "backend" sends the resume text with each search so the
+# API tier scores it with its shared model, "local" loads the model into this Streamlit process
+SCORING_MODE = "backend"
+
+# Fetch job details (employer reviews) for every job on the page in one background
+# request, so "View Reviews" opens without waiting; seconds a click waits for it
+PREFETCH_JOB_DETAILS = True
+PREFETCH_WAIT_SECONDS = 10
+# Job ids per /job-details request (the backend's JOB_DETAILS_BATCH_MAX)
+JOB_DETAILS_BATCH_MAX = 50
+
+# Skip optional requests (like the prefetch above) while an endpoint's recent p95 latency is over this
+API_SLOW_SECONDS = 5
+
+@st.cache_resource
+def api_client():
+    """Pooled, retrying HTTP client for the backend, shared by all sessions"""
+    return ApiClient(API_BASE_URL)
+
 @st.cache_resource
+def start_model_warmup():
+    """Start loading the model (and importing torch) on a background thread, once per process"""
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-warmup")
+    return executor.submit(load_model, EMBEDDING_MODEL_NAME)
+
 def load_sentence_transformer():
-    """Load sentence transformer model (cached for performance)"""
+    """Return the sentence transformer model, waiting for the warm-up if it is still loading"""
     try:
-        model = SentenceTransformer('all-MiniLM-L6-v2')
-        return model
+        return start_model_warmup().result()
     except Exception as e:
         st.error(f"Error loading sentence transformer model: {str(e)}")
         return None
 
-def extract_text_from_pdf(uploaded_file):
-    """Extract text from uploaded PDF file"""
+@st.cache_resource
+def load_embedding_cache():
+    """Open the on-disk job description embedding cache shared across sessions and workers"""
     try:
-        pdf_reader = PyPDF2.PdfReader(uploaded_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text()
-        return text.strip()
+        return EmbeddingCache(embedding_model_key())
     except Exception as e:
-        st.error(f"Error reading PDF: {str(e)}")
-        return ""
+        st.warning(f"Embedding cache unavailable, scoring without it: {str(e)}")
+        return None
 
-def clean_text(text):
-    """Clean and preprocess text for better similarity matching"""
-    if not text:
+@st.cache_resource
+def load_text_extractor():
+    """Start the bounded pool of resume parser processes shared by all sessions"""
+    return TextExtractor()
+
+def fingerprint_bytes(data):
+    """Build a stable hash of raw file bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def parse_resume(resume_fingerprint, file_type, _file_bytes):
+    """Extract resume text from uploaded bytes, memoized across sessions by the file fingerprint"""
+    path = None
+    try:
+        path = spool_to_file(_file_bytes, ".pdf" if file_type == "application/pdf" else ".txt")
+        extracted = load_text_extractor().extract(path, file_type)
+    except ExtractionError as e:
+        st.error(f"Error reading resume: {str(e)}")
         return ""
+    finally:
+        if path is not None:
+            os.remove(path)
     
-    # Remove extra whitespace and newlines
-    text = re.sub(r'\s+', ' ', text)
-    # Remove special characters but keep alphanumeric and basic punctuation
-    text = re.sub(r'[^\w\s\-\.\,\;\:\!\?]', ' ', text)
-    # Convert to lowercase
-    text = text.lower().strip()
-    return text
+    if extracted.truncated:
+        st.info(f"Only the first {extracted.pages} of {extracted.total_pages} pages of your resume were read.")
+    return extracted.text
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def get_resume_embedding(resume_fingerprint, model_name, _resume_text, _model):
+    """Clean and encode a resume once per (file fingerprint, model), shared across sessions"""
+    if not _model:
+        return None
+    return encode_resume(_resume_text, _model)
 
-def calculate_similarity_score(resume_text, job_description, model):
-    """Calculate similarity score between resume and job description"""
+def calculate_similarity_scores(resume_text, job_descriptions, model, embedding_cache=None, resume_embedding=None):
+    """Calculate similarity scores between a resume and many job descriptions in one batch"""
     try:
-        if not resume_text or not job_description or not model:
-            return 0.0
-        
-        # Clean texts
-        clean_resume = clean_text(resume_text)
-        clean_job = clean_text(job_description)
-        
-        if not clean_resume or not clean_job:
-            return 0.0
-        
-        # Generate embeddings
-        resume_embedding = model.encode([clean_resume])
-        job_embedding = model.encode([clean_job])
-        
-        # Calculate cosine similarity
-        similarity = cosine_similarity(resume_embedding, job_embedding)[0][0]
-        
-        # Convert to percentage and round
-        return round(float(similarity * 100), 1)
+        if not resume_text or not model:
+            return [0.0] * len(job_descriptions)
+        
+        return score_texts(
+            resume_text,
+            job_descriptions,
+            model,
+            embedding_cache=embedding_cache,
+            resume_embedding=resume_embedding
+        )
         
     except Exception as e:
         st.error(f"Error calculating similarity: {str(e)}")
-        return 0.0
+        return [0.0] * len(job_descriptions)
+
+@dataclass(frozen=True)
+class ScoredJob:
+    """A job from the search results together with its precomputed similarity score"""
+    job: dict
+    similarity_score: float = 0.0
+
+def fingerprint_texts(texts):
+    """Build a stable hash over a sequence of texts"""
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update((text or "").encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+def score_job_results(jobs, resume_fingerprint, resume_text, model):
+    """Score a result set against the resume once and reuse the scores on later reruns"""
+    # Jobs scored by the backend already carry their match score
+    if jobs and all("match_score" in job for job in jobs):
+        return [ScoredJob(job, job["match_score"]) for job in jobs]
+    
+    if not resume_text or not model:
+        return [ScoredJob(job) for job in jobs]
+    
+    # Key the scores on the resume file and on the exact jobs in the result set
+    scores_key = (
+        resume_fingerprint,
+        fingerprint_texts(f"{job.get('job_id', '')}:{job.get('job_description', '')}" for job in jobs)
+    )
+    cached = st.session_state.get("scored_results")
+    if cached and cached["key"] == scores_key:
+        return list(cached["scored_jobs"])
+    
+    resume_embedding = get_resume_embedding(resume_fingerprint, embedding_model_key(), resume_text, model)
+    if resume_embedding is None:
+        return [ScoredJob(job) for job in jobs]
+    
+    similarity_scores = calculate_similarity_scores(
+        resume_text,
+        [job.get("job_description", "") for job in jobs],
+        model,
+        embedding_cache=load_embedding_cache(),
+        resume_embedding=resume_embedding
+    )
+    scored_jobs = [ScoredJob(job, score) for job, score in zip(jobs, similarity_scores)]
+    st.session_state["scored_results"] = {"key": scores_key, "scored_jobs": scored_jobs}
+    return list(scored_jobs)
 
 def get_similarity_class(score):
     """Get CSS class based on similarity score"""
@@ -226,18 +308,29 @@ def get_similarity_emoji(score):
     else:
         return "📋"  # Basic match
 
-def search_jobs(query, page=1, country="ind", date_posted="today"):
-    """Search for jobs using the FastAPI endpoint"""
+def resume_files(resume_upload):
+    """Build the multipart payload for sending an uploaded resume to the backend
+
+    The text already extracted here is sent as a TXT file, so the backend
+    does not parse the same PDF again on every search.
+    """
+    return {"resume": (resume_upload["name"], resume_upload["text"].encode("utf-8"), "text/plain")}
+
+def search_jobs(query, page=1, country="ind", date_posted="today", num_pages=1, resume_upload=None):
+    """Search for jobs using the FastAPI endpoint, scored against the resume when one is given"""
     try:
-        url = f"{API_BASE_URL}/search-jobs-simple"
         params = {
             "query": query,
             "page": page,
+            "num_pages": num_pages,
             "country": country,
             "date_posted": date_posted
         }
         
-        response = requests.get(url, params=params)
+        if resume_upload:
+            response = api_client().post("/search-jobs-with-resume", params=params, files=resume_files(resume_upload))
+        else:
+            response = api_client().get("/search-jobs-simple", params=params)
         
         if response.status_code == 200:
             return response.json()
@@ -248,11 +341,37 @@ def search_jobs(query, page=1, country="ind", date_posted="today"):
         st.error(f"Error connecting to API: {str(e)}")
         return None
 
+def stream_search_jobs(query, page=1, country="ind", date_posted="today", num_pages=1, resume_upload=None):
+    """Yield search events from the streaming FastAPI endpoint as result pages arrive"""
+    try:
+        params = {
+            "query": query,
+            "page": page,
+            "num_pages": num_pages,
+            "country": country,
+            "date_posted": date_posted
+        }
+        
+        if resume_upload:
+            request = api_client().post("/search-jobs-with-resume/stream", params=params, files=resume_files(resume_upload), stream=True)
+        else:
+            request = api_client().post("/search-jobs/stream", json=params, stream=True)
+        
+        with request as response:
+            if response.status_code != 200:
+                st.error(f"Error searching jobs: {response.status_code} - {response.text}")
+                return
+            
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+    except requests.exceptions.RequestException as e:
+        st.error(f"Error connecting to API: {str(e)}")
+
 def get_job_details(job_id):
     """Get detailed job information and reviews"""
     try:
-        url = f"{API_BASE_URL}/job-details/{job_id}"
-        response = requests.get(url)
+        response = api_client().get(f"/job-details/{job_id}", endpoint="/job-details/{job_id}")
         
         if response.status_code == 200:
             return response.json()
@@ -263,6 +382,56 @@ def get_job_details(job_id):
         st.error(f"Error connecting to API: {str(e)}")
         return None
 
+@st.cache_resource
+def job_details_executor():
+    """Background threads for job details prefetches, shared by all sessions"""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="job-details")
+
+def fetch_job_details_batch(job_ids):
+    """Fetch details for many jobs, JOB_DETAILS_BATCH_MAX per request (runs on a background thread, so no st calls)"""
+    details = {}
+    for start in range(0, len(job_ids), JOB_DETAILS_BATCH_MAX):
+        response = api_client().post("/job-details", json={"job_ids": job_ids[start:start + JOB_DETAILS_BATCH_MAX]})
+        response.raise_for_status()
+        details.update(response.json()["jobs"])
+    return details
+
+def prefetch_job_details(jobs):
+    """Start fetching details for the jobs on the page, once per result set"""
+    client = api_client()
+    if not client.available or client.latency("/job-details") > API_SLOW_SECONDS:
+        return  # the backend is struggling; fetch details only when a user asks for them
+    
+    job_ids = [job["job_id"] for job in jobs if job.get("job_id")]
+    key = fingerprint_texts(job_ids)
+    prefetch = st.session_state.get("job_details_prefetch")
+    if job_ids and (prefetch is None or prefetch["key"] != key):
+        st.session_state.job_details_prefetch = {
+            "key": key,
+            "future": job_details_executor().submit(fetch_job_details_batch, job_ids)
+        }
+
+def cached_job_details(job_id):
+    """Job details from this session's prefetch or earlier lookups, fetching them only when missing"""
+    details_by_id = st.session_state.setdefault("job_details", {})
+    if job_id in details_by_id:
+        return details_by_id[job_id]
+    
+    prefetch = st.session_state.get("job_details_prefetch")
+    if prefetch is not None:
+        try:
+            prefetched = prefetch["future"].result(timeout=PREFETCH_WAIT_SECONDS)
+            if job_id in prefetched:
+                details_by_id[job_id] = prefetched[job_id]
+                return details_by_id[job_id]
+        except Exception:
+            pass  # fall back to fetching this job on its own
+    
+    job_details = get_job_details(job_id)
+    if job_details is not None:
+        details_by_id[job_id] = job_details
+    return job_details
+
 def display_star_rating(score, max_score=5):
     """Display star rating"""
     filled_stars = int(score)
@@ -278,17 +447,11 @@ def truncate_text(text, max_length=200):
         return text, False
     return text[:max_length] + "...", True
 
-def display_job_card(job, job_index, resume_text=None, similarity_model=None):
-    """Display a job card with all details and similarity score"""
+def display_job_card(scored_job, job_index):
+    """Display a job card with all details and its precomputed similarity score"""
     
-    # Calculate similarity score if resume is provided
-    similarity_score = 0.0
-    if resume_text and similarity_model and job.get("job_description"):
-        similarity_score = calculate_similarity_score(
-            resume_text, 
-            job.get("job_description", ""), 
-            similarity_model
-        )
+    job = scored_job.job
+    similarity_score = scored_job.similarity_score
     
     with st.container():
         # Create columns for layout
@@ -303,7 +466,7 @@ def display_job_card(job, job_index, resume_text=None, similarity_model=None):
                 st.markdown(f'<div class="employer-name">🏢 {job.get("employer_name", "N/A")}</div>', unsafe_allow_html=True)
             
             with score_col:
-                if resume_text and similarity_score > 0:
+                if similarity_score > 0:
                     similarity_class = get_similarity_class(similarity_score)
                     similarity_emoji = get_similarity_emoji(similarity_score)
                     st.markdown(f"""
@@ -349,7 +512,7 @@ def display_job_card(job, job_index, resume_text=None, similarity_model=None):
                 """, unsafe_allow_html=True)
         
         # Show similarity insights if available
-        if resume_text and similarity_score > 0:
+        if similarity_score > 0:
             with st.expander(f"🔍 Similarity Insights ({similarity_score}% match)", expanded=False):
                 if similarity_score >= 70:
                     st.success(f"🎯 **Excellent Match!** This job aligns very well with your resume. Your skills and experience seem highly relevant.")
@@ -400,7 +563,7 @@ def display_job_card(job, job_index, resume_text=None, similarity_model=None):
         # Show reviews if button is clicked
         if st.session_state.get(f"show_reviews_{job_index}", False):
             with st.spinner("Loading reviews..."):
-                job_details = get_job_details(job.get("job_id"))
+                job_details = cached_job_details(job.get("job_id"))
                 
                 if job_details and job_details.get("data") and len(job_details["data"]) > 0:
                     employer_reviews = job_details["data"][0].get("employer_reviews", [])
@@ -429,17 +592,83 @@ def display_job_card(job, job_index, resume_text=None, similarity_model=None):
         
         st.markdown("---")
 
+def backend_resume_upload():
+    """The uploaded resume to send with searches when the backend does the scoring"""
+    if SCORING_MODE == "backend" and st.session_state.resume_text:
+        return st.session_state.resume_upload
+    return None
+
+def stream_job_results(query, page, country, date_posted, num_pages):
+    """Render job cards page by page while the backend streams them, and return the collected results"""
+    progress = st.empty()
+    jobs = []
+    page_jobs = []
+    semantic_scoring = True
+    received_events = False
+    
+    for event in stream_search_jobs(query, page, country, date_posted, num_pages, backend_resume_upload()):
+        received_events = True
+        if event["event"] == "job":
+            page_jobs.append(event["job"])
+        elif event["event"] == "page":
+            # Score and show each page as soon as it lands
+            scored_jobs = score_job_results(
+                page_jobs,
+                st.session_state.resume_fingerprint,
+                st.session_state.resume_text,
+                st.session_state.similarity_model
+            )
+            for scored_job in scored_jobs:
+                display_job_card(scored_job, len(jobs))
+                jobs.append(scored_job.job)
+            page_jobs = []
+            progress.info(f"Loaded {len(jobs)} jobs so far...")
+        elif event["event"] == "error":
+            if event.get("page") is None:
+                st.warning(f"Search error: {event.get('detail')}")
+            else:
+                st.warning(f"Could not load page {event.get('page')}: {event.get('detail')}")
+        elif event["event"] == "scores":
+            # Scores fused over the whole result set replace the per-page ones for ranking
+            for job, match_score in zip(jobs, event["match_scores"]):
+                job["match_score"] = match_score
+        elif event["event"] == "done":
+            semantic_scoring = event.get("semantic_scoring", True)
+    
+    progress.empty()
+    if not received_events:
+        return None
+    return {"status": "success", "total_jobs": len(jobs), "jobs": jobs, "semantic_scoring": semantic_scoring}
+
 def main():
+    # Warm the model up in the background so the first page paints without waiting for it
+    if SCORING_MODE == "local":
+        start_model_warmup()
+    
     st.title("💼 AI powered Job Search Portal")
     st.markdown("Find your dream job with detailed information, company reviews, and AI-powered resume matching!")
     
+    if not api_client().available:
+        st.warning("The job search service is not responding right now. Searches will resume automatically once it recovers.")
+    
     # Initialize session state
     if 'resume_text' not in st.session_state:
         st.session_state.resume_text = None
+    if 'resume_fingerprint' not in st.session_state:
+        st.session_state.resume_fingerprint = None
+    if 'resume_upload' not in st.session_state:
+        st.session_state.resume_upload = None
     if 'similarity_model' not in st.session_state:
         st.session_state.similarity_model = None
     if 'auto_search' not in st.session_state:
         st.session_state.auto_search = False
+    if 'search_query' not in st.session_state:
+        st.session_state.search_query = "developer jobs in chennai"
+    
+    # Apply a popular search picked on the previous run before the query widget is created
+    if "sample_query" in st.session_state:
+        st.session_state.search_query = st.session_state.pop("sample_query")
+        st.session_state.auto_search = True
     
     # Resume upload section
     st.markdown("### 📋 Upload Your Resume for AI-Powered Job Matching")
@@ -453,16 +682,21 @@ def main():
     # Process uploaded resume
     if uploaded_file is not None:
         with st.spinner("Processing your resume..."):
-            if uploaded_file.type == "application/pdf":
-                resume_text = extract_text_from_pdf(uploaded_file)
-            else:
-                resume_text = str(uploaded_file.read(), "utf-8")
+            # Reruns and identical uploads hit the cache instead of re-parsing the file
+            file_bytes = uploaded_file.getvalue()
+            resume_fingerprint = fingerprint_bytes(file_bytes)
+            resume_text = parse_resume(resume_fingerprint, uploaded_file.type, file_bytes)
             
             if resume_text:
                 st.session_state.resume_text = resume_text
+                st.session_state.resume_fingerprint = resume_fingerprint
+                st.session_state.resume_upload = {
+                    "name": f"{os.path.splitext(uploaded_file.name)[0]}.txt",
+                    "text": resume_text
+                }
                 
-                # Load similarity model if not already loaded
-                if st.session_state.similarity_model is None:
+                # Load similarity model if not already loaded (only needed when scoring locally)
+                if SCORING_MODE == "local" and st.session_state.similarity_model is None:
                     with st.spinner("Loading AI model for similarity analysis..."):
                         st.session_state.similarity_model = load_sentence_transformer()
                 
@@ -478,6 +712,8 @@ def main():
     if st.session_state.resume_text:
         if st.button("🗑️ Clear Resume"):
             st.session_state.resume_text = None
+            st.session_state.resume_fingerprint = None
+            st.session_state.resume_upload = None
             st.rerun()
     
     # Sidebar for search parameters
@@ -493,7 +729,7 @@ def main():
         # Search query
         query = st.text_input(
             "Job Search Query",
-            value="developer jobs in chennai",
+            key="search_query",
             help="Enter job title, location, or keywords"
         )
         
@@ -520,6 +756,15 @@ def main():
             help="Page number for pagination"
         )
         
+        # Number of pages fetched in one search (fetched in parallel by the backend)
+        num_pages = st.number_input(
+            "Pages to Fetch",
+            min_value=1,
+            max_value=10,
+            value=1,
+            help="Fetch several pages of results at once, starting from the page number above"
+        )
+        
         # Sorting options when resume is uploaded
         if st.session_state.resume_text:
             sort_by = st.selectbox(
@@ -537,70 +782,83 @@ def main():
     if search_button or st.session_state.auto_search:
         st.session_state.auto_search = True
         
-        with st.spinner("Searching for jobs..."):
-            results = search_jobs(query, page, country, date_posted)
+        # Reuse the results of the last search across reruns until the search changes
+        search_params = (query, page, country, date_posted, num_pages, st.session_state.resume_fingerprint)
+        last_search = st.session_state.get("search_results")
+        if not search_button and last_search and last_search["params"] == search_params:
+            results = last_search["results"]
+        elif STREAM_RESULTS:
+            results = stream_job_results(query, page, country, date_posted, num_pages)
+            if results is not None:
+                st.session_state.search_results = {"params": search_params, "results": results}
+                if results.get("jobs"):
+                    # Redraw the complete result set with summary, sorting and interactive cards
+                    st.rerun()
+        else:
+            with st.spinner("Searching for jobs..."):
+                results = search_jobs(query, page, country, date_posted, num_pages, backend_resume_upload())
+            if results is not None:
+                st.session_state.search_results = {"params": search_params, "results": results}
         
         if results and results.get("jobs"):
             jobs = results["jobs"]
             
             # Calculate similarity scores for all jobs if resume is uploaded
-            if st.session_state.resume_text and st.session_state.similarity_model:
-                with st.spinner("Calculating job similarity scores..."):
-                    for job in jobs:
-                        if job.get("job_description"):
-                            similarity_score = calculate_similarity_score(
-                                st.session_state.resume_text,
-                                job.get("job_description", ""),
-                                st.session_state.similarity_model
-                            )
-                            job['similarity_score'] = similarity_score
-                        else:
-                            job['similarity_score'] = 0.0
-                
-                # Sort jobs based on user preference
-                if sort_by == "similarity":
-                    jobs.sort(key=lambda x: x.get('similarity_score', 0), reverse=True)
-                elif sort_by == "date":
-                    # This would require parsing dates, simplified here
-                    pass  # Keep original order for now
+            with st.spinner("Calculating job similarity scores..."):
+                scored_jobs = score_job_results(
+                    jobs,
+                    st.session_state.resume_fingerprint,
+                    st.session_state.resume_text,
+                    st.session_state.similarity_model
+                )
+            
+            # Sort jobs based on user preference
+            if sort_by == "similarity":
+                scored_jobs.sort(key=lambda x: x.similarity_score, reverse=True)
+            elif sort_by == "date":
+                # Newest first, by the posting time the backend parsed once per job
+                scored_jobs.sort(key=lambda x: x.job.get("job_posted_at_timestamp") or 0, reverse=True)
             
             # Display search summary
             col1, col2, col3 = st.columns([2, 1, 1])
             
             with col1:
                 st.success(f"Found {len(jobs)} jobs for '{query}'")
+                if results.get("semantic_scoring") is False:
+                    st.warning("Match scores are based on keywords only: the embedding model is unavailable.")
             
             with col2:
                 if st.session_state.resume_text:
-                    avg_score = sum(job.get('similarity_score', 0) for job in jobs) / len(jobs)
+                    avg_score = sum(scored_job.similarity_score for scored_job in scored_jobs) / len(scored_jobs)
                     st.metric("Avg Match Score", f"{avg_score:.1f}%")
             
             with col3:
                 if st.session_state.resume_text:
-                    high_match_count = sum(1 for job in jobs if job.get('similarity_score', 0) >= 70)
+                    high_match_count = sum(1 for scored_job in scored_jobs if scored_job.similarity_score >= 70)
                     st.metric("High Matches", high_match_count)
             
             # Display best matches summary if resume is uploaded
-            if st.session_state.resume_text and jobs:
-                best_matches = [job for job in jobs if job.get('similarity_score', 0) >= 70]
+            if st.session_state.resume_text and scored_jobs:
+                best_matches = [scored_job for scored_job in scored_jobs if scored_job.similarity_score >= 70]
                 if best_matches:
                     st.info(f"🎯 Found {len(best_matches)} high-similarity matches (70%+) based on your resume!")
-                elif any(job.get('similarity_score', 0) >= 50 for job in jobs):
-                    good_matches = [job for job in jobs if job.get('similarity_score', 0) >= 50]
+                elif any(scored_job.similarity_score >= 50 for scored_job in scored_jobs):
+                    good_matches = [scored_job for scored_job in scored_jobs if scored_job.similarity_score >= 50]
                     st.info(f"👍 Found {len(good_matches)} good matches (50%+) based on your resume!")
             
-            # Display jobs
-            for i, job in enumerate(jobs):
-                display_job_card(
-                    job, 
-                    i, 
-                    resume_text=st.session_state.resume_text,
-                    similarity_model=st.session_state.similarity_model
-                )
+            if PREFETCH_JOB_DETAILS:
+                prefetch_job_details(jobs)
+            
+            # Display jobs (rendering only reads the precomputed scores)
+            for i, scored_job in enumerate(scored_jobs):
+                display_job_card(scored_job, i)
             
             # Pagination info
             if len(jobs) > 0:
-                st.info(f"Showing page {page} results. Use the sidebar to navigate to other pages.")
+                if num_pages > 1:
+                    st.info(f"Showing results from pages {page}-{page + num_pages - 1}. Use the sidebar to navigate to other pages.")
+                else:
+                    st.info(f"Showing page {page} results. Use the sidebar to navigate to other pages.")
         
         elif results:
             st.warning("No jobs found for your search criteria. Try adjusting your search terms.")
@@ -629,13 +887,6 @@ def main():
             if st.button("🎨 UI/UX Designer Jobs"):
                 st.session_state["sample_query"] = "ui ux designer jobs"
                 st.rerun()
-        
-        # Handle sample query selection
-        if "sample_query" in st.session_state:
-            st.session_state.auto_search = True
-            query = st.session_state["sample_query"]
-            del st.session_state["sample_query"]
-            st.rerun()
     
     # Footer
     st.markdown("---")
@@ -0,0 +1,270 @@
+import threading
+from collections import OrderedDict, deque
+
+import numpy as np
+
+from matching import top_k
+
+# BM25 term frequency saturation and document length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Postings of newly added jobs are due to be merged into the sorted arrays once there are this
+# many (or a quarter as many as are already merged), so adding a job stays cheap
+MERGE_MIN_PENDING = 50_000
+
+# Words too common to say anything about a match; they are neither indexed nor scored
+STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been being but by can could do does for from
+had has have having he her his how i if in into is it its me more most my no not of on or our ours
+out over own she should so some such than that the their them then there these they this those to
+too under up very was we were what when where which while who whom why will with would you your
+""".split())
+
+
+class LexicalIndex:
+    """In-memory BM25 inverted index over job postings, built incrementally as jobs arrive
+
+    Postings are kept compact in flat numpy arrays sorted by term (doc ids
+    and term frequencies, with one offset per term), plus a small buffer of
+    postings of jobs added since the last merge. Scoring gathers the postings
+    of the query's terms and computes BM25 for all of them at once, so a
+    resume is scored against thousands of jobs in a few milliseconds.
+
+    A changed posting is re-added under a new doc id and the old one is
+    marked dead; dead postings are dropped (and doc ids renumbered) when the
+    buffer is merged. Beyond max_docs the least recently added jobs are dropped.
+
+    add() only queues a job, so it is cheap to call from the event loop.
+    Queued jobs are indexed by the next score() or merge(), which hold a lock
+    and are meant to run on worker threads. A merge of a large index takes
+    seconds; merge_due() tells the owner when to start one.
+    """
+
+    def __init__(self, max_docs=50_000, k1=BM25_K1, b=BM25_B):
+        self.max_docs = max_docs
+        self.k1 = k1
+        self.b = b
+        self.merges = 0
+
+        self._terms = {}
+        self._vocabulary = []
+        self._docs = OrderedDict()  # job_id -> (doc id, source hash)
+        self._doc_lengths = np.zeros(0, dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._num_docs = 0
+        self._total_length = 0.0
+
+        # Merged postings: term t's are _post_docs/_post_tfs[_offsets[t]:_offsets[t + 1]]
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._post_docs = np.zeros(0, dtype=np.int32)
+        self._post_tfs = np.zeros(0, dtype=np.float32)
+
+        # Postings added since the last merge, by term id
+        self._pending = {}
+        self._pending_count = 0
+
+        # Jobs handed to add() and not indexed yet; appending to a deque needs no lock. Postings
+        # queued and indexed are counted separately so each counter has a single writer.
+        self._incoming = deque()
+        self._queued_postings = 0
+        self._indexed_postings = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, job_id):
+        return job_id in self._docs
+
+    def _term_ids(self, tokens, create=False):
+        ids = []
+        for token in tokens:
+            if token in STOPWORDS:
+                continue
+            term_id = self._terms.get(token)
+            if term_id is None and create:
+                term_id = self._terms[token] = len(self._vocabulary)
+                self._vocabulary.append(token)
+            if term_id is not None:
+                ids.append(term_id)
+        return ids
+
+    def add(self, job_id, source_hash, token_counts):
+        """Queue one job from its {token: count} for indexing; re-adding an unchanged job only marks it recently used"""
+        self._incoming.append((job_id, source_hash, token_counts))
+        self._queued_postings += len(token_counts)
+
+    def _index_incoming(self):
+        """Index every queued job (the caller holds the lock)"""
+        while self._incoming:
+            job_id, source_hash, token_counts = self._incoming.popleft()
+            self._add(job_id, source_hash, token_counts)
+            self._indexed_postings += len(token_counts)
+
+    def _add(self, job_id, source_hash, token_counts):
+        known = self._docs.get(job_id)
+        if known is not None:
+            if known[1] == source_hash:
+                self._docs.move_to_end(job_id)
+                return
+            self._remove(job_id)
+
+        doc_id = self._num_docs
+        self._num_docs += 1
+        if doc_id >= len(self._alive):
+            capacity = max(1024, 2 * len(self._alive))
+            self._alive = np.concatenate([self._alive, np.zeros(capacity - len(self._alive), dtype=bool)])
+            self._doc_lengths = np.concatenate([self._doc_lengths, np.zeros(capacity - len(self._doc_lengths), dtype=np.float32)])
+        token_counts = {token: count for token, count in token_counts.items() if token not in STOPWORDS}
+        length = sum(token_counts.values())
+        self._alive[doc_id] = True
+        self._doc_lengths[doc_id] = length
+        self._total_length += length
+        self._docs[job_id] = (doc_id, source_hash)
+
+        for term_id, count in zip(self._term_ids(token_counts, create=True), token_counts.values()):
+            docs, tfs = self._pending.setdefault(term_id, ([], []))
+            docs.append(doc_id)
+            tfs.append(count)
+        self._pending_count += len(token_counts)
+
+        while len(self._docs) > self.max_docs:
+            self._remove(next(iter(self._docs)))
+
+    def add_features(self, features):
+        """Index the JobFeatures records of fetched jobs (those without a job_id are skipped)"""
+        for job_features in features:
+            if job_features.job_id:
+                self.add(job_features.job_id, job_features.source_hash, job_features.token_counts)
+
+    def _remove(self, job_id):
+        doc_id, _ = self._docs.pop(job_id)
+        self._alive[doc_id] = False
+        self._total_length -= float(self._doc_lengths[doc_id])
+
+    def merge_due(self):
+        """Whether enough postings are waiting that a merge should be run"""
+        waiting = self._pending_count + self._queued_postings - self._indexed_postings
+        return waiting >= max(MERGE_MIN_PENDING, len(self._post_docs) // 4)
+
+    def merge(self):
+        """Fold queued jobs and pending postings into the sorted arrays, dropping dead documents and renumbering the rest"""
+        with self._lock:
+            self._index_incoming()
+            self._merge()
+
+    def _merge(self):
+        num_terms = len(self._vocabulary)
+        terms = [np.repeat(np.arange(len(self._offsets) - 1, dtype=np.int32), np.diff(self._offsets))]
+        docs = [self._post_docs]
+        tfs = [self._post_tfs]
+        for term_id, (pending_docs, pending_tfs) in self._pending.items():
+            terms.append(np.full(len(pending_docs), term_id, dtype=np.int32))
+            docs.append(np.asarray(pending_docs, dtype=np.int32))
+            tfs.append(np.asarray(pending_tfs, dtype=np.float32))
+        terms, docs, tfs = np.concatenate(terms), np.concatenate(docs), np.concatenate(tfs)
+
+        keep = self._alive[docs]
+        terms, docs, tfs = terms[keep], docs[keep], tfs[keep]
+
+        # Renumber live documents densely so the per-document arrays stop growing with churn
+        alive = self._alive[:self._num_docs]
+        new_ids = np.cumsum(alive, dtype=np.int64) - 1
+        docs = new_ids[docs].astype(np.int32)
+        self._doc_lengths = self._doc_lengths[:self._num_docs][alive].copy()
+        self._num_docs = len(self._doc_lengths)
+        self._alive = np.ones(self._num_docs, dtype=bool)
+        self._docs = OrderedDict((job_id, (int(new_ids[doc_id]), source_hash)) for job_id, (doc_id, source_hash) in self._docs.items())
+
+        order = np.lexsort((docs, terms))
+        self._post_docs = docs[order]
+        self._post_tfs = tfs[order]
+        self._offsets = np.concatenate([[0], np.cumsum(np.bincount(terms, minlength=num_terms))]).astype(np.int64)
+        self._pending = {}
+        self._pending_count = 0
+        self.merges += 1
+
+    def _postings(self, term_ids):
+        """Concatenated (query term position, doc id, term frequency) of the given terms' live postings"""
+        labels, docs, tfs = [], [], []
+        for position, term_id in enumerate(term_ids):
+            if term_id + 1 < len(self._offsets):
+                start, end = self._offsets[term_id], self._offsets[term_id + 1]
+                docs.append(self._post_docs[start:end])
+                tfs.append(self._post_tfs[start:end])
+                labels.append(np.full(end - start, position, dtype=np.int32))
+            pending = self._pending.get(term_id)
+            if pending is not None:
+                docs.append(np.asarray(pending[0], dtype=np.int32))
+                tfs.append(np.asarray(pending[1], dtype=np.float32))
+                labels.append(np.full(len(pending[0]), position, dtype=np.int32))
+        if not docs:
+            empty = np.zeros(0, dtype=np.int32)
+            return empty, empty, np.zeros(0, dtype=np.float32)
+        labels, docs, tfs = np.concatenate(labels), np.concatenate(docs), np.concatenate(tfs)
+        live = self._alive[docs]
+        return labels[live], docs[live], tfs[live]
+
+    def score(self, query_tokens, job_ids, keywords=10):
+        """BM25 scores of the given jobs for a query, and each job's best matching query terms
+
+        Returns (scores array aligned with job_ids, list of keyword lists), with
+        keywords ordered by their contribution to the score. Jobs not in the
+        index score 0.
+        """
+        with self._lock:
+            self._index_incoming()
+            return self._score(query_tokens, job_ids, keywords)
+
+    def _score(self, query_tokens, job_ids, keywords):
+        scores = np.zeros(len(job_ids), dtype=np.float32)
+        matched = [[] for _ in job_ids]
+        term_ids = self._term_ids(dict.fromkeys(query_tokens))
+        live_docs = len(self._docs)
+        if not term_ids or not live_docs:
+            return scores, matched
+
+        labels, docs, tfs = self._postings(term_ids)
+
+        # Map doc ids to positions in job_ids and keep only the postings of those jobs
+        positions = np.full(self._num_docs, -1, dtype=np.int64)
+        for position, job_id in enumerate(job_ids):
+            known = self._docs.get(job_id)
+            if known is not None:
+                positions[known[0]] = position
+        df = np.bincount(labels, minlength=len(term_ids))
+        selected = positions[docs] >= 0
+        labels, docs, tfs = labels[selected], docs[selected], tfs[selected]
+        if not len(docs):
+            return scores, matched
+
+        idf = np.log1p((live_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        average_length = self._total_length / live_docs
+        norms = self.k1 * (1 - self.b + self.b * self._doc_lengths[docs] / average_length)
+        contributions = idf[labels] * tfs * (self.k1 + 1) / (tfs + norms)
+        rows = positions[docs]
+        scores = np.bincount(rows, weights=contributions, minlength=len(job_ids)).astype(np.float32)
+
+        if keywords:
+            # Each job's per-term contributions as one dense row, then its best few terms
+            contribution_matrix = np.zeros((len(job_ids), len(term_ids)), dtype=np.float32)
+            contribution_matrix[rows, labels] = contributions
+            best = top_k(contribution_matrix, keywords)
+            found = np.take_along_axis(contribution_matrix, best, axis=-1) > 0
+            query_terms = [self._vocabulary[term_id] for term_id in term_ids]
+            matched = [
+                [query_terms[label] for label, matches in zip(job_best, job_found) if matches]
+                for job_best, job_found in zip(best.tolist(), found.tolist())
+            ]
+        return scores, matched
+
+    def stats(self):
+        return {
+            "jobs": len(self._docs),
+            "queued_jobs": len(self._incoming),
+            "terms": len(self._vocabulary),
+            "postings": int(len(self._post_docs) + self._pending_count),
+            "pending_postings": self._pending_count,
+            "merges": self.merges
+        }
@@ -0,0 +1,344 @@
+import copy
+import os
+import re
+import threading
+import weakref
+
+import numpy as np
+
+# Sentence transformer used for resume matching (also part of the embedding cache key)
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+
+# Inference backend: "torch" (fp32), "torch-int8" (dynamically quantized Linear layers, CPU only)
+# or "onnx" (ONNX Runtime, exported from the same checkpoint; needs optimum[onnxruntime])
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+EMBEDDING_BACKENDS = ("torch", "torch-int8", "onnx")
+
+# Number of texts encoded per forward pass
+ENCODE_BATCH_SIZE = 32
+
+# Long-document chunking: "none" embeds each text once (the model truncates it),
+# "mean" / "max" pool the embeddings of overlapping token windows into one vector,
+# "maxsim" scores each resume chunk against its best-matching job chunk
+CHUNK_AGGREGATION = os.getenv("EMBEDDING_CHUNK_AGGREGATION", "none").lower()
+CHUNK_AGGREGATIONS = ("none", "mean", "max", "maxsim")
+
+# Tokens shared by consecutive chunks so no sentence is cut off from its context
+CHUNK_OVERLAP_TOKENS = int(os.getenv("EMBEDDING_CHUNK_OVERLAP_TOKENS", "32"))
+
+# Used when the model does not report its own sequence limit
+DEFAULT_MAX_SEQ_LENGTH = 256
+
+# Hybrid ranking: "weighted" blends embedding percentages with saturated BM25 scores,
+# "rrf" uses reciprocal rank fusion of the two rankings, "none" keeps embeddings only.
+# HYBRID_LEXICAL_WEIGHT is the share of the lexical side in either
+HYBRID_FUSION = os.getenv("HYBRID_FUSION", "weighted").lower()
+HYBRID_FUSIONS = ("none", "weighted", "rrf")
+HYBRID_LEXICAL_WEIGHT = float(os.getenv("HYBRID_LEXICAL_WEIGHT", "0.3"))
+RRF_K = 60
+
+# BM25 score that "weighted" counts as a 50% lexical match (a few distinctive resume terms
+# found in the job); scores map to s / (s + midpoint), so they never exceed 100
+HYBRID_LEXICAL_MIDPOINT = float(os.getenv("HYBRID_LEXICAL_MIDPOINT", "10"))
+
+
+def embedding_model_key(model_name=EMBEDDING_MODEL_NAME, backend=EMBEDDING_BACKEND):
+    """Name embeddings are cached under, so vectors from different backends never mix"""
+    return model_name if backend == "torch" else f"{model_name}:{backend}"
+
+
+def load_model(model_name=EMBEDDING_MODEL_NAME, backend=EMBEDDING_BACKEND):
+    """Load the sentence transformer used to embed resumes and job descriptions"""
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {EMBEDDING_BACKENDS}")
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "onnx":
+        return SentenceTransformer(model_name, backend="onnx")
+    if backend == "torch-int8":
+        import torch
+        model = SentenceTransformer(model_name, device="cpu")
+        # Weights become int8, activations are quantized on the fly per batch
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return SentenceTransformer(model_name)
+
+
+def clean_text(text):
+    """Clean and preprocess text for better similarity matching"""
+    if not text:
+        return ""
+
+    # Remove extra whitespace and newlines
+    text = re.sub(r'\s+', ' ', text)
+    # Remove special characters but keep alphanumeric and basic punctuation
+    text = re.sub(r'[^\w\s\-\.\,\;\:\!\?]', ' ', text)
+    # Convert to lowercase
+    text = text.lower().strip()
+    return text
+
+
+def encode_texts(texts, model, batch_size=ENCODE_BATCH_SIZE):
+    """Encode texts in batched forward passes and return unit-normalized float32 embeddings"""
+    embeddings = model.encode(
+        texts,
+        batch_size=batch_size,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False
+    )
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+def normalize(embeddings):
+    """Scale embeddings to unit length as float32, so cosine similarity becomes a dot product"""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+    return embeddings / np.where(norms > 0, norms, 1)
+
+
+def similarity_matrix(query_embeddings, job_embeddings):
+    """Cosine similarities of M unit-normalized queries to N unit-normalized jobs, as one (M, N) matmul"""
+    queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+    jobs = np.atleast_2d(np.asarray(job_embeddings, dtype=np.float32))
+    return queries @ jobs.T
+
+
+def top_k(scores, k):
+    """Indices of the k highest scores along the last axis, best first, without sorting every score"""
+    scores = np.asarray(scores)
+    k = max(0, min(k, scores.shape[-1]))
+    if k < scores.shape[-1]:
+        top = np.argpartition(scores, -k, axis=-1)[..., scores.shape[-1] - k:]
+    else:
+        top = np.broadcast_to(np.arange(scores.shape[-1]), scores.shape)
+    order = np.argsort(-np.take_along_axis(scores, top, axis=-1), axis=-1, kind="stable")
+    return np.take_along_axis(top, order, axis=-1)
+
+
+def chunking_enabled(aggregation=CHUNK_AGGREGATION):
+    if aggregation not in CHUNK_AGGREGATIONS:
+        raise ValueError(f"Unknown chunk aggregation {aggregation!r}, expected one of {CHUNK_AGGREGATIONS}")
+    return aggregation != "none"
+
+
+def chunk_window(model):
+    """Number of word pieces per chunk: the model's sequence limit minus its [CLS]/[SEP] tokens"""
+    max_seq_length = getattr(model, "max_seq_length", None) or DEFAULT_MAX_SEQ_LENGTH
+    return max(max_seq_length - 2, 2 * CHUNK_OVERLAP_TOKENS + 1)
+
+
+def chunk_text(text, tokenizer, window, overlap=CHUNK_OVERLAP_TOKENS):
+    """Split text into overlapping windows of at most `window` tokens
+
+    Chunks are slices of the original text (via the tokenizer's offset
+    mapping), so a text that already fits comes back unchanged and shares
+    its embedding cache entry with the unchunked mode.
+    """
+    offsets = tokenizer(
+        text,
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+        verbose=False
+    )["offset_mapping"]
+    if len(offsets) <= window:
+        return [text]
+
+    chunks = []
+    step = window - overlap
+    for start in range(0, len(offsets), step):
+        tokens = offsets[start:start + window]
+        chunks.append(text[tokens[0][0]:tokens[-1][1]])
+        if start + window >= len(offsets):
+            break
+    return chunks
+
+
+# Per model, a copy of its tokenizer used only for chunking, and the lock held while using it
+_chunk_tokenizers = weakref.WeakKeyDictionary()
+_chunk_tokenizers_lock = threading.Lock()
+
+
+def chunk_tokenizer(model):
+    """The (tokenizer copy, lock) chunking uses for a model
+
+    Fast tokenizers are not thread-safe: tokenizing on one thread while
+    another encodes with the same model (every Streamlit session shares one
+    model, and the backend encodes on worker threads) fails with "Already
+    borrowed". Chunking therefore uses a private copy, one thread at a time.
+    """
+    with _chunk_tokenizers_lock:
+        if model not in _chunk_tokenizers:
+            _chunk_tokenizers[model] = (copy.deepcopy(model.tokenizer), threading.Lock())
+        return _chunk_tokenizers[model]
+
+
+def chunk_texts(texts, model, overlap=CHUNK_OVERLAP_TOKENS):
+    """Chunk every text, returning the flat chunk list and each text's (start, end) slice of it"""
+    tokenizer, lock = chunk_tokenizer(model)
+    window = chunk_window(model)
+    chunks, spans = [], []
+    with lock:
+        for text in texts:
+            start = len(chunks)
+            chunks.extend(chunk_text(text, tokenizer, window, overlap))
+            spans.append((start, len(chunks)))
+    return chunks, spans
+
+
+def split_chunks(chunk_embeddings, spans):
+    """Group flat chunk embeddings back into one (chunks, dim) matrix per text"""
+    return [chunk_embeddings[start:end] for start, end in spans]
+
+
+def encode_documents(texts, model, batch_size=ENCODE_BATCH_SIZE, embedding_cache=None):
+    """Encode the chunks of many cleaned texts in one batch, each chunk cached on its own"""
+    chunks, spans = chunk_texts(texts, model)
+    if embedding_cache is not None:
+        embeddings = embedding_cache.encode(chunks, lambda missing: encode_texts(missing, model, batch_size))
+    else:
+        embeddings = encode_texts(chunks, model, batch_size)
+    return split_chunks(embeddings, spans)
+
+
+def pool_chunks(chunk_embeddings, aggregation=CHUNK_AGGREGATION):
+    """Pool a (chunks, dim) matrix into one unit-normalized vector (maxsim falls back to the mean)"""
+    chunk_embeddings = np.asarray(chunk_embeddings, dtype=np.float32)
+    if chunk_embeddings.ndim == 1:
+        return chunk_embeddings
+    if aggregation == "max":
+        pooled = chunk_embeddings.max(axis=0)
+    else:
+        pooled = chunk_embeddings.mean(axis=0)
+    return normalize(pooled)
+
+
+def chunk_similarities(resume_chunks, job_chunk_sets, aggregation=CHUNK_AGGREGATION):
+    """Similarity of each job's chunks to the resume's chunks under the given aggregation"""
+    if aggregation != "maxsim":
+        resume_vector = pool_chunks(resume_chunks, aggregation)
+        job_vectors = np.vstack([pool_chunks(chunks, aggregation) for chunks in job_chunk_sets])
+        return similarity_matrix(resume_vector, job_vectors)[0]
+
+    # Every resume chunk against every job chunk in one product, then per job:
+    # the best job chunk for each resume chunk, averaged over the resume chunks
+    similarities = similarity_matrix(resume_chunks, np.vstack(job_chunk_sets))
+    starts = np.cumsum([0] + [len(chunks) for chunks in job_chunk_sets[:-1]])
+    return np.maximum.reduceat(similarities, starts, axis=1).mean(axis=0)
+
+
+def encode_resume(resume_text, model, embedding_cache=None):
+    """Clean and encode a resume, returning None when nothing is left to embed
+
+    With chunking enabled the result is the (chunks, dim) matrix of its chunk
+    embeddings rather than a single vector.
+    """
+    clean_resume = clean_text(resume_text)
+    if not clean_resume:
+        return None
+    if chunking_enabled():
+        return encode_documents([clean_resume], model, embedding_cache=embedding_cache)[0]
+    if embedding_cache is not None:
+        return embedding_cache.encode([clean_resume], lambda texts: encode_texts(texts, model))[0]
+    return encode_texts([clean_resume], model)[0]
+
+
+def clean_job_texts(job_texts):
+    """Clean job texts, returning (position, cleaned text) pairs for the ones with content left"""
+    clean_jobs = [(i, clean_text(text)) for i, text in enumerate(job_texts)]
+    return [(i, text) for i, text in clean_jobs if text]
+
+
+def similarity_percentages(resume_embedding, job_embeddings):
+    """Cosine similarities of unit-normalized job embeddings to a resume, as rounded percentages
+
+    job_embeddings is either one row per job, or (with chunking) a list of
+    per-job chunk matrices scored against the resume's chunk matrix.
+    """
+    if isinstance(job_embeddings, list):
+        similarities = chunk_similarities(resume_embedding, job_embeddings)
+    else:
+        similarities = similarity_matrix(resume_embedding, job_embeddings)[0]
+    return [round(float(similarity * 100), 1) for similarity in similarities]
+
+
+def similarity_scores(resume_embeddings, job_embeddings):
+    """(M, N) similarities of many resumes to many jobs
+
+    Plain embeddings take one matmul; with chunking both sides are lists of
+    chunk matrices and each resume row uses the chunk aggregation.
+    """
+    if isinstance(job_embeddings, list):
+        return np.vstack([chunk_similarities(resume, job_embeddings) for resume in resume_embeddings])
+    return similarity_matrix(resume_embeddings, job_embeddings)
+
+
+def rank_positions(scores):
+    """1-based rank of each score, best first (ties keep input order)"""
+    ranks = np.empty(len(scores), dtype=np.int64)
+    ranks[np.argsort(-np.asarray(scores), kind="stable")] = np.arange(1, len(scores) + 1)
+    return ranks
+
+
+def fusion_depends_on_set(fusion=HYBRID_FUSION):
+    """Whether a job's fused score depends on the other jobs fused with it, so it must be fused over a whole result set"""
+    return fusion == "rrf"
+
+
+def fuse_scores(semantic, lexical, fusion=HYBRID_FUSION, lexical_weight=HYBRID_LEXICAL_WEIGHT, rrf_k=RRF_K,
+                lexical_midpoint=HYBRID_LEXICAL_MIDPOINT):
+    """Combine embedding percentages and BM25 scores of the same jobs into hybrid percentages
+
+    BM25 scores have no fixed scale, so "weighted" saturates them as
+    s / (s + lexical_midpoint), which scores each job on its own whatever else
+    is in the set. "rrf" only looks at the two rankings within the set, and
+    is scaled so a job ranked first by both gets 100.
+    """
+    if fusion not in HYBRID_FUSIONS:
+        raise ValueError(f"Unknown hybrid fusion {fusion!r}, expected one of {HYBRID_FUSIONS}")
+    semantic = np.asarray(semantic, dtype=np.float64)
+    lexical = np.asarray(lexical, dtype=np.float64)
+    if fusion == "none" or not len(semantic):
+        fused = semantic
+    elif fusion == "weighted":
+        lexical = np.maximum(lexical, 0)
+        lexical_percentages = lexical / (lexical + lexical_midpoint) * 100
+        fused = (1 - lexical_weight) * semantic + lexical_weight * lexical_percentages
+    else:
+        fused = (
+            (1 - lexical_weight) / (rrf_k + rank_positions(semantic))
+            + lexical_weight / (rrf_k + rank_positions(lexical))
+        ) * (rrf_k + 1) * 100
+    return [round(float(score), 1) for score in fused]
+
+
+def score_texts(resume_text, job_texts, model, batch_size=ENCODE_BATCH_SIZE, embedding_cache=None, resume_embedding=None):
+    """Score a resume against many job texts as match percentages (0.0 for empty texts)
+
+    The resume is encoded once (unless a precomputed embedding is passed), every
+    job text missing from the embedding cache is encoded in one batched call,
+    and all cosine similarities come from a single matrix-vector product. With
+    chunking enabled the same holds per chunk instead of per text.
+    """
+    scores = [0.0] * len(job_texts)
+
+    # Clean texts, remembering which jobs still have content to score
+    clean_jobs = clean_job_texts(job_texts)
+    if not clean_jobs:
+        return scores
+
+    if resume_embedding is None:
+        resume_embedding = encode_resume(resume_text, model)
+        if resume_embedding is None:
+            return scores
+
+    texts = [text for _, text in clean_jobs]
+    if chunking_enabled():
+        job_embeddings = encode_documents(texts, model, batch_size, embedding_cache)
+    elif embedding_cache is not None:
+        job_embeddings = embedding_cache.encode(texts, lambda missing: encode_texts(missing, model, batch_size))
+    else:
+        job_embeddings = encode_texts(texts, model, batch_size)
+
+    for (i, _), score in zip(clean_jobs, similarity_percentages(resume_embedding, job_embeddings)):
+        scores[i] = score
+    return scores
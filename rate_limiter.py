@@ -0,0 +1,276 @@
+import asyncio
+import heapq
+import itertools
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlite_db import connect_shared
+
+# Lower runs first: searches a user is waiting on go ahead of background refreshes
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+
+class RateLimitExceeded(Exception):
+    """An upstream call was refused locally; retry_after is seconds until it may succeed (None if unknown)"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_rates(spec):
+    """Parse "name=rate:burst,..." (e.g. "/search=5:10") into {name: (rate, burst)}"""
+    rates = {}
+    for item in (spec or "").split(","):
+        if not item.strip():
+            continue
+        name, _, limit = item.strip().rpartition("=")
+        rate, _, burst = limit.partition(":")
+        rates[name] = (float(rate), float(burst or rate))
+    return rates
+
+
+class TokenBucket:
+    """Refills rate tokens per second up to burst; one token is one upstream request"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self):
+        self._refill()
+        return self.tokens >= 1
+
+    def take(self):
+        self.tokens -= 1
+
+    def wait_seconds(self):
+        """Seconds until one token is available"""
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    def drain(self, seconds):
+        """Empty the bucket so the next token arrives in about `seconds` (after an upstream 429)"""
+        self._refill()
+        self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+
+class MonthlyQuota:
+    """Upstream requests made per API key this calendar month (UTC), counted in a SQLite file
+
+    The count is shared by every worker process on the host and survives
+    restarts. Background requests may not use the last reserve_fraction of
+    the limit, which is kept for interactive searches. A limit of 0 only
+    counts requests.
+    """
+
+    def __init__(self, path, limit, reserve_fraction=0.0):
+        self.path = path
+        self.limit = limit
+        self.reserve_fraction = reserve_fraction
+        self.refused = 0
+        self._lock = threading.Lock()
+
+        # Full sync: a count lost in a crash would let the quota be overspent
+        self._conn = connect_shared(path, synchronous=None)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS quota (
+                month TEXT NOT NULL,
+                api_key TEXT NOT NULL,
+                used INTEGER NOT NULL,
+                PRIMARY KEY (month, api_key)
+            )
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def month():
+        return datetime.now(timezone.utc).strftime("%Y-%m")
+
+    def limit_for(self, priority):
+        if not self.limit:
+            return sys.maxsize
+        if priority == PRIORITY_INTERACTIVE:
+            return self.limit
+        return int(self.limit * (1 - self.reserve_fraction))
+
+    def try_consume(self, api_key, priority=PRIORITY_INTERACTIVE):
+        """Count one request against api_key's quota, or return False when it is used up"""
+        month = self.month()
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO quota (month, api_key, used) VALUES (?, ?, 0)", (month, api_key))
+            # Check and increment in one statement, so concurrent workers cannot both take the last request
+            updated = self._conn.execute(
+                "UPDATE quota SET used = used + 1 WHERE month = ? AND api_key = ? AND used < ?",
+                (month, api_key, self.limit_for(priority))
+            ).rowcount
+            self._conn.commit()
+        if not updated:
+            self.refused += 1
+        return bool(updated)
+
+    def used(self, api_key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT used FROM quota WHERE month = ? AND api_key = ?",
+                (self.month(), api_key)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def remaining(self, api_key, priority=PRIORITY_INTERACTIVE):
+        return max(0, self.limit_for(priority) - self.used(api_key))
+
+    def stats(self):
+        with self._lock:
+            used = self._conn.execute("SELECT SUM(used) FROM quota WHERE month = ?", (self.month(),)).fetchone()[0]
+        return {"month": self.month(), "limit_per_key": self.limit, "used": used or 0, "refused": self.refused}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class UpstreamRateLimiter:
+    """Admission control for upstream API calls: token buckets, a priority queue and a monthly quota
+
+    Every API key has a bucket for its overall plan rate, and endpoints
+    with their own limits get a bucket per key too; a request needs a token
+    from both. Callers that cannot go right away wait in one priority queue
+    per key (interactive before background, then first come first served)
+    for at most max_wait_seconds. Each admitted request is counted against
+    the key's monthly quota.
+    """
+
+    def __init__(self, rate, burst, endpoint_rates=None, key_rates=None, quota=None, max_wait_seconds=10.0):
+        self.rate = rate
+        self.burst = burst
+        self.endpoint_rates = endpoint_rates or {}
+        self.key_rates = key_rates or {}
+        self.quota = quota
+        self.max_wait_seconds = max_wait_seconds
+        self.admitted = 0
+        self.waited = 0
+        self.refused = 0
+        self._key_buckets = {}
+        self._endpoint_buckets = {}
+        self._queues = {}
+        self._timers = {}
+        self._sequence = itertools.count()
+
+    def _key_bucket(self, api_key):
+        if api_key not in self._key_buckets:
+            self._key_buckets[api_key] = TokenBucket(*self.key_rates.get(api_key, (self.rate, self.burst)))
+        return self._key_buckets[api_key]
+
+    def _endpoint_bucket(self, endpoint, api_key):
+        if endpoint not in self.endpoint_rates:
+            return None
+        if (endpoint, api_key) not in self._endpoint_buckets:
+            self._endpoint_buckets[(endpoint, api_key)] = TokenBucket(*self.endpoint_rates[endpoint])
+        return self._endpoint_buckets[(endpoint, api_key)]
+
+    def ready(self, endpoint, api_key):
+        """Whether a call to endpoint with api_key would be admitted without queueing"""
+        endpoint_bucket = self._endpoint_bucket(endpoint, api_key)
+        return (
+            not self._queues.get(api_key)
+            and self._key_bucket(api_key).available()
+            and (endpoint_bucket is None or endpoint_bucket.available())
+        )
+
+    async def acquire(self, endpoint, api_key, priority=PRIORITY_INTERACTIVE):
+        """Wait for permission to call endpoint with api_key, raising RateLimitExceeded when it is not given in time"""
+        # Quota reads and writes go to SQLite, which may wait on other workers' writes, so not on the event loop
+        if self.quota is not None and await asyncio.to_thread(self.quota.remaining, api_key, priority) <= 0:
+            self.refused += 1
+            raise RateLimitExceeded("Monthly API quota exhausted")
+
+        waiter = [priority, next(self._sequence), endpoint, asyncio.get_running_loop().create_future()]
+        queue = self._queues.setdefault(api_key, [])
+        heapq.heappush(queue, waiter)
+        self._dispatch(api_key)
+        future = waiter[3]
+        if not future.done():
+            self.waited += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.max_wait_seconds)
+        except asyncio.TimeoutError:
+            self._remove(api_key, waiter)
+            self.refused += 1
+            raise RateLimitExceeded(
+                f"Upstream rate limit: no request slot within {self.max_wait_seconds:g} seconds",
+                retry_after=self._key_bucket(api_key).wait_seconds()
+            )
+        except asyncio.CancelledError:
+            self._remove(api_key, waiter)
+            raise
+        # The quota may have run out while this request was queued
+        if self.quota is not None and not await asyncio.to_thread(self.quota.try_consume, api_key, priority):
+            self.refused += 1
+            raise RateLimitExceeded("Monthly API quota exhausted")
+        self.admitted += 1
+
+    def _remove(self, api_key, waiter):
+        queue = self._queues.get(api_key, [])
+        if waiter in queue:
+            queue.remove(waiter)
+            heapq.heapify(queue)
+
+    def _dispatch(self, api_key):
+        """Admit queued requests of api_key, highest priority first, while their buckets have tokens"""
+        timer = self._timers.pop(api_key, None)
+        if timer is not None:
+            timer.cancel()
+        queue = self._queues.get(api_key, [])
+        key_bucket = self._key_bucket(api_key)
+        waits = []
+        for waiter in sorted(queue):
+            priority, _, endpoint, future = waiter
+            if not key_bucket.available():
+                waits.append(key_bucket.wait_seconds())
+                break
+            endpoint_bucket = self._endpoint_bucket(endpoint, api_key)
+            if endpoint_bucket is not None and not endpoint_bucket.available():
+                # Another endpoint of this key may still have room
+                waits.append(endpoint_bucket.wait_seconds())
+                continue
+
+            queue.remove(waiter)
+            if future.done():
+                continue
+            key_bucket.take()
+            if endpoint_bucket is not None:
+                endpoint_bucket.take()
+            future.set_result(None)
+
+        heapq.heapify(queue)
+        if queue and waits:
+            self._timers[api_key] = asyncio.get_running_loop().call_later(min(waits), self._dispatch, api_key)
+
+    def penalize(self, endpoint, api_key, seconds):
+        """Hold back api_key's requests for `seconds` after upstream answered 429"""
+        self._key_bucket(api_key).drain(seconds)
+        endpoint_bucket = self._endpoint_bucket(endpoint, api_key)
+        if endpoint_bucket is not None:
+            endpoint_bucket.drain(seconds)
+
+    def stats(self):
+        return {
+            "admitted": self.admitted,
+            "waited": self.waited,
+            "refused": self.refused,
+            "queued": sum(len(queue) for queue in self._queues.values()),
+            "quota": self.quota.stats() if self.quota is not None else None
+        }
@@ -0,0 +1,201 @@
+import asyncio
+import copy
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlite_db import connect_shared
+
+
+class CacheEntry:
+    """A cached value together with the time it was stored and when it expires"""
+
+    def __init__(self, value, stored_at, expires_at):
+        self.value = value
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+
+    @property
+    def age(self):
+        return time.time() - self.stored_at
+
+    @property
+    def expired(self):
+        return time.time() >= self.expires_at
+
+
+class MemoryCacheBackend:
+    """In-process LRU store, private to one worker"""
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            value, stored_at, expires_at = entry
+        # Hand out a copy so callers can mutate results without corrupting the cache
+        return CacheEntry(copy.deepcopy(value), stored_at, expires_at)
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        with self._lock:
+            self._entries[key] = (copy.deepcopy(value), now, now + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """JSON values in a SQLite file, shared by every worker process on the host"""
+
+    def __init__(self, path, max_entries=1000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        self._conn = connect_shared(path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)")
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, stored_at, expires_at FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        value, stored_at, expires_at = row
+        return CacheEntry(json.loads(value), stored_at, expires_at)
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, stored_at, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(value), now, now + ttl, now)
+            )
+            overflow = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    """
+                    DELETE FROM responses WHERE key IN (
+                        SELECT key FROM responses ORDER BY last_access ASC LIMIT ?
+                    )
+                    """,
+                    (overflow,)
+                )
+            self._conn.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_cache_backend(kind="memory", path=None, max_entries=1000):
+    """Create a cache backend by name ("memory" or "sqlite")"""
+    if kind == "memory":
+        return MemoryCacheBackend(max_entries=max_entries)
+    if kind == "sqlite":
+        return SQLiteCacheBackend(path or os.path.join(".cache", "responses.sqlite3"), max_entries=max_entries)
+    raise ValueError(f"Unknown cache backend: {kind}")
+
+
+class ResponseCache:
+    """TTL cache over a pluggable backend, with hit/miss counters for this process"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+
+    def get(self, key, allow_stale=False):
+        """Return the live CacheEntry for key, or None when missing or expired
+
+        With allow_stale an expired entry that has not been evicted yet is
+        returned too (check entry.expired), for serving old results when
+        fresh ones cannot be fetched.
+        """
+        entry = self.backend.get(key)
+        if entry is None or (entry.expired and not allow_stale):
+            self.misses += 1
+            return None
+        if entry.expired:
+            self.stale_hits += 1
+        else:
+            self.hits += 1
+        return entry
+
+    async def get_async(self, key, allow_stale=False):
+        """get() for async callers; a SQLite lookup (which also writes last_access) runs on a worker thread"""
+        if isinstance(self.backend, MemoryCacheBackend):
+            return self.get(key, allow_stale)
+        return await asyncio.to_thread(self.get, key, allow_stale)
+
+    def set(self, key, value, ttl):
+        self.backend.set(key, value, ttl)
+
+    async def set_async(self, key, value, ttl):
+        """set() for async callers, off the event loop unless the backend is in memory"""
+        if isinstance(self.backend, MemoryCacheBackend):
+            return self.set(key, value, ttl)
+        return await asyncio.to_thread(self.set, key, value, ttl)
+
+    def delete(self, key):
+        self.backend.delete(key)
+
+    @property
+    def hit_ratio(self):
+        lookups = self.hits + self.misses
+        return round(self.hits / lookups, 4) if lookups else 0.0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hit_ratio,
+            "stale_hits": self.stale_hits,
+            "entries": len(self.backend)
+        }
+
+    def close(self):
+        if hasattr(self.backend, "close"):
+            self.backend.close()
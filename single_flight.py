@@ -0,0 +1,43 @@
+import asyncio
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one in-flight task
+
+    The first caller for a key starts the work; callers arriving while it is
+    still running await the same task and receive its result (or exception).
+    Once the task finishes the key is released, so later calls start fresh.
+    """
+
+    def __init__(self):
+        self._in_flight = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn):
+        """Run fn() for key, or join the call already in flight for it"""
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._release(key, done))
+            self.started += 1
+        else:
+            self.coalesced += 1
+
+        # Shield the shared task so one caller disconnecting does not cancel it for the others
+        return await asyncio.shield(task)
+
+    def _release(self, key, task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as retrieved even if every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self):
+        return {
+            "in_flight": len(self._in_flight),
+            "started": self.started,
+            "coalesced": self.coalesced
+        }
@@ -0,0 +1,24 @@
+import os
+import sqlite3
+
+# Timeout (seconds) a writer waits for another process holding the database lock
+SQLITE_BUSY_TIMEOUT = 30
+
+
+def connect_shared(path, synchronous="NORMAL"):
+    """Open a SQLite file that several worker processes read and write at once
+
+    The parent directory is created if needed, the database runs in WAL mode
+    with a busy timeout, and the connection may be used from any thread
+    (callers serialize access with their own lock). synchronous=None keeps
+    SQLite's default (FULL) for data that must survive a power loss.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(path, timeout=SQLITE_BUSY_TIMEOUT, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    if synchronous is not None:
+        conn.execute(f"PRAGMA synchronous={synchronous}")
+    return conn
@@ -0,0 +1,54 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from embedding_service import EmbeddingService
+
+
+def make_service(encode_sync):
+    service = EmbeddingService(model=None, max_wait_ms=1)
+    service._encode_sync = encode_sync
+    return service
+
+
+def test_encode_batches_requests():
+    def encode_sync(texts):
+        return np.array([[float(len(text))] for text in texts], dtype=np.float32)
+
+    async def run():
+        service = make_service(encode_sync)
+        await service.start()
+        try:
+            return await asyncio.gather(service.encode(["a", "bb"]), service.encode(["bb", "ccc"]))
+        finally:
+            await service.stop()
+
+    first, second = asyncio.run(run())
+    assert first[:, 0].tolist() == [1.0, 2.0]
+    assert second[:, 0].tolist() == [2.0, 3.0]
+
+
+def test_stop_fails_running_batches():
+    started = threading.Event()
+    release = threading.Event()
+
+    def encode_sync(texts):
+        started.set()
+        release.wait(5)
+        return np.zeros((len(texts), 1), dtype=np.float32)
+
+    async def run():
+        service = make_service(encode_sync)
+        await service.start()
+        request = asyncio.ensure_future(service.encode(["a"]))
+        await asyncio.to_thread(started.wait, 5)
+        assert len(service._batch_tasks) == 1
+        await service.stop()
+        release.set()
+        assert not service._batch_tasks
+        with pytest.raises(RuntimeError, match="stopped"):
+            await request
+
+    asyncio.run(run())
@@ -0,0 +1,74 @@
+import threading
+
+import numpy as np
+import pytest
+
+from job_index import JobIndex
+
+DIM = 8
+
+
+def make_jobs(start, count):
+    jobs = [{"job_id": f"job-{i}", "job_country": "IN" if i % 2 else "US"} for i in range(start, start + count)]
+    texts = [f"posting {i}" for i in range(start, start + count)]
+    embeddings = np.random.default_rng(start).normal(size=(count, DIM)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return jobs, texts, embeddings
+
+
+@pytest.fixture
+def index(tmp_path):
+    job_index = JobIndex(str(tmp_path / "index"), "test-model")
+    yield job_index
+    job_index.close()
+
+
+def test_search_returns_best_match_first(index):
+    jobs, texts, embeddings = make_jobs(0, 50)
+    assert index.upsert_many(jobs, texts, embeddings) == 50
+
+    results = index.search(embeddings[7], k=3)
+    assert results[0][0]["job_id"] == "job-7"
+    assert results[0][1] == pytest.approx(1.0, abs=1e-5)
+    assert all(job["job_country"] == "IN" for job, _ in index.search(embeddings[7], k=10, country="in"))
+
+
+def test_rejects_embeddings_of_another_dimension(index):
+    jobs, texts, embeddings = make_jobs(0, 2)
+    index.upsert_many(jobs, texts, embeddings)
+    with pytest.raises(ValueError):
+        index.upsert_many(*make_jobs(2, 1)[:2], np.ones((1, DIM + 1), dtype=np.float32))
+
+
+def test_concurrent_upserts_and_searches(index):
+    index.upsert_many(*make_jobs(0, 10))
+    query = make_jobs(0, 1)[2][0]
+    errors = []
+    writing = threading.Event()
+    writing.set()
+
+    def writer():
+        try:
+            for start in range(10, 3010, 3):
+                index.upsert_many(*make_jobs(start, 3))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            writing.clear()
+
+    def reader():
+        try:
+            while writing.is_set():
+                results = index.search(query, k=5, country="us")
+                assert results and results[0][0]["job_id"] == "job-0"
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert len(index) == 3010
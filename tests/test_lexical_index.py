@@ -0,0 +1,84 @@
+import threading
+
+import numpy as np
+
+from lexical_index import LexicalIndex
+
+WORDS = ["python", "django", "react", "sql", "docker", "aws", "java", "spark", "kafka", "golang"]
+
+
+def token_counts(i):
+    return {WORDS[i % len(WORDS)]: 1 + i % 3, WORDS[(i * 7) % len(WORDS)]: 1, f"rare{i}": 1}
+
+
+def add_jobs(index, start, count):
+    for i in range(start, start + count):
+        index.add(f"job-{i}", f"hash-{i}", token_counts(i))
+
+
+def test_score_ranks_matching_jobs():
+    index = LexicalIndex()
+    index.add("python", "h1", {"python": 2, "django": 1})
+    index.add("java", "h2", {"java": 1, "spring": 1})
+
+    scores, keywords = index.score(["python", "the"], ["python", "java", "unknown"])
+
+    assert scores[0] > 0
+    assert scores[1] == scores[2] == 0
+    assert keywords == [["python"], [], []]
+
+
+def test_merge_keeps_scores():
+    index = LexicalIndex()
+    add_jobs(index, 0, 200)
+    job_ids = [f"job-{i}" for i in range(200)]
+    before, _ = index.score(["python", "sql", "rare5"], job_ids)
+
+    index.merge()
+    after, _ = index.score(["python", "sql", "rare5"], job_ids)
+
+    assert index.stats()["pending_postings"] == 0
+    np.testing.assert_allclose(after, before, rtol=1e-5)
+
+
+def test_concurrent_add_score_and_merge():
+    index = LexicalIndex()
+    errors = []
+    done = threading.Event()
+
+    def run(fn):
+        def target():
+            try:
+                fn()
+            except Exception as e:
+                errors.append(e)
+        return threading.Thread(target=target)
+
+    def writer():
+        # Small batches so merges and scores interleave with the adds
+        for start in range(0, 3000, 10):
+            add_jobs(index, start, 10)
+        done.set()
+
+    def scorer():
+        while not done.is_set():
+            index.score(["python", "kafka"], [f"job-{i}" for i in range(0, 3000, 7)])
+
+    def merger():
+        while not done.is_set():
+            index.merge()
+
+    threads = [run(writer), run(scorer), run(scorer), run(merger)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+
+    job_ids = [f"job-{i}" for i in range(3000)]
+    expected = LexicalIndex()
+    add_jobs(expected, 0, 3000)
+    scores, _ = index.score(["python", "kafka", "rare42"], job_ids)
+    expected_scores, _ = expected.score(["python", "kafka", "rare42"], job_ids)
+    assert len(index) == 3000
+    np.testing.assert_allclose(scores, expected_scores, rtol=1e-5)
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from rate_limiter import (
+    PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, MonthlyQuota, RateLimitExceeded, UpstreamRateLimiter
+)
+
+
+def test_interactive_requests_go_before_background():
+    async def run():
+        limiter = UpstreamRateLimiter(rate=20, burst=1)
+        await limiter.acquire("/search", "key")  # Uses the only token, so the rest queue
+        order = []
+
+        async def call(name, priority):
+            await limiter.acquire("/search", "key", priority)
+            order.append(name)
+
+        tasks = [asyncio.ensure_future(call("background-1", PRIORITY_BACKGROUND))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.ensure_future(call("background-2", PRIORITY_BACKGROUND)))
+        await asyncio.sleep(0)
+        tasks.append(asyncio.ensure_future(call("interactive", PRIORITY_INTERACTIVE)))
+        await asyncio.gather(*tasks)
+        return order, limiter.stats()
+
+    order, stats = asyncio.run(run())
+    assert order == ["interactive", "background-1", "background-2"]
+    assert stats["admitted"] == 4
+    assert stats["queued"] == 0
+
+
+def test_waiting_too_long_is_refused():
+    async def run():
+        limiter = UpstreamRateLimiter(rate=0.1, burst=1, max_wait_seconds=0.05)
+        await limiter.acquire("/search", "key")
+        with pytest.raises(RateLimitExceeded) as refused:
+            await limiter.acquire("/search", "key")
+        return refused.value, limiter.stats()
+
+    error, stats = asyncio.run(run())
+    assert error.retry_after > 0
+    assert stats["refused"] == 1
+    assert stats["queued"] == 0
+
+
+def test_background_requests_leave_the_quota_reserve(tmp_path):
+    quota = MonthlyQuota(str(tmp_path / "quota.sqlite3"), limit=4, reserve_fraction=0.5)
+
+    async def run():
+        limiter = UpstreamRateLimiter(rate=1000, burst=100, quota=quota)
+        for _ in range(2):
+            await limiter.acquire("/search", "key", PRIORITY_BACKGROUND)
+        with pytest.raises(RateLimitExceeded):
+            await limiter.acquire("/search", "key", PRIORITY_BACKGROUND)
+        for _ in range(2):
+            await limiter.acquire("/search", "key", PRIORITY_INTERACTIVE)
+        with pytest.raises(RateLimitExceeded):
+            await limiter.acquire("/search", "key", PRIORITY_INTERACTIVE)
+
+    try:
+        asyncio.run(run())
+        assert quota.used("key") == 4
+    finally:
+        quota.close()
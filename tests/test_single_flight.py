@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_result():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def run():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(5)))
+        return results, flight.stats()
+
+    results, stats = asyncio.run(run())
+    assert results == ["result"] * 5
+    assert len(calls) == 1
+    assert stats == {"in_flight": 0, "started": 1, "coalesced": 4}
+
+
+def test_error_reaches_every_waiter_and_releases_the_key():
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    async def succeeding():
+        return "retried"
+
+    async def run():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do("key", failing) for _ in range(3)), return_exceptions=True)
+        # The failed call is not cached: the next call for the key starts fresh
+        return results, await flight.do("key", succeeding)
+
+    results, retried = asyncio.run(run())
+    assert len(attempts) == 1
+    assert all(isinstance(result, ValueError) and str(result) == "upstream failed" for result in results)
+    assert retried == "retried"
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def run():
+        flight = SingleFlight()
+        first = asyncio.ensure_future(flight.do("key", slow))
+        second = asyncio.ensure_future(flight.do("key", slow))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == "result"
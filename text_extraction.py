@@ -0,0 +1,217 @@
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+
+# Resume formats we can read, by file extension
+RESUME_FILE_TYPES = {
+    ".pdf": "application/pdf",
+    ".txt": "text/plain"
+}
+
+# Limits that keep one hostile upload from tying up a parser: pages read per
+# PDF, bytes accepted per file, and seconds one extraction may take
+EXTRACTION_MAX_PAGES = int(os.getenv("EXTRACTION_MAX_PAGES", "50"))
+EXTRACTION_MAX_BYTES = int(os.getenv("EXTRACTION_MAX_BYTES", str(10 * 1024 * 1024)))
+EXTRACTION_TIMEOUT_SECONDS = float(os.getenv("EXTRACTION_TIMEOUT_SECONDS", "20"))
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Uploads smaller than this stay in memory while being spooled
+SPOOL_MEMORY_BYTES = 1024 * 1024
+
+
+class ExtractionError(Exception):
+    """A file could not be turned into text; status is the HTTP status that fits the cause"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class ExtractedText:
+    text: str
+    pages: int
+    total_pages: int
+    page_seconds: list
+
+    @property
+    def truncated(self):
+        return self.pages < self.total_pages
+
+
+def resume_file_type(filename, content_type=None):
+    """Return the resume MIME type for an upload, from its content type or else its extension"""
+    if content_type in RESUME_FILE_TYPES.values():
+        return content_type
+    return RESUME_FILE_TYPES.get(os.path.splitext(filename or "")[1].lower())
+
+
+def copy_limited(source, path, max_bytes=EXTRACTION_MAX_BYTES):
+    """Stream source into a new file at path, giving up (and removing it) past max_bytes"""
+    copied = 0
+    with open(path, "wb") as target:
+        while True:
+            block = source.read(SPOOL_MEMORY_BYTES)
+            if not block:
+                return True
+            copied += len(block)
+            if copied > max_bytes:
+                break
+            target.write(block)
+    os.remove(path)
+    return False
+
+
+def spool_to_file(source, suffix="", max_bytes=EXTRACTION_MAX_BYTES):
+    """Copy a file object or bytes to a temporary file for a parser process, returning its path
+
+    The caller removes the file. Raises ExtractionError when it is larger than max_bytes.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+        spooled.write(source)
+        spooled.seek(0)
+        source = spooled
+    fd, path = tempfile.mkstemp(prefix="resume-", suffix=suffix)
+    os.close(fd)
+    if not copy_limited(source, path, max_bytes):
+        raise ExtractionError(f"File is larger than {max_bytes // (1024 * 1024)} MB", status=413)
+    return path
+
+
+def extract_text_from_path(path, file_type, max_pages=EXTRACTION_MAX_PAGES):
+    """Extract the text of a PDF or TXT file on disk, reading at most max_pages PDF pages
+
+    Runs in a parser process, so everything it takes and returns is picklable.
+    """
+    if file_type != "application/pdf":
+        started = time.perf_counter()
+        with open(path, "rb") as f:
+            text = f.read().decode("utf-8", errors="replace").strip()
+        return ExtractedText(text, 1, 1, [time.perf_counter() - started])
+
+    import PyPDF2  # only parser processes pay for this import
+
+    reader = PyPDF2.PdfReader(path, strict=False)
+    total_pages = len(reader.pages)
+    texts = []
+    page_seconds = []
+    for page in reader.pages[:max_pages]:
+        started = time.perf_counter()
+        texts.append(page.extract_text() or "")
+        page_seconds.append(time.perf_counter() - started)
+
+    # Join page texts once instead of growing one string page by page
+    return ExtractedText("\n".join(texts).strip(), len(texts), total_pages, page_seconds)
+
+
+class TextExtractor:
+    """Bounded pool of parser processes for resume files
+
+    At most `workers` files are parsed at once; each extraction gets
+    timeout_seconds. A file that runs over is abandoned and the pool is
+    restarted, which kills the process stuck on it. Plain text is read in
+    the calling process, since decoding it is cheap and cannot hang.
+    """
+
+    def __init__(self, workers=EXTRACTION_WORKERS, timeout_seconds=EXTRACTION_TIMEOUT_SECONDS, max_pages=EXTRACTION_MAX_PAGES):
+        self.workers = workers
+        self.timeout_seconds = timeout_seconds
+        self.max_pages = max_pages
+        self.extracted = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self.pages = 0
+        self.seconds = 0.0
+        self.slowest_page_seconds = 0.0
+
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(workers)
+        # Threads that wait on parser results for async callers, one per parser process
+        self._waiters = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extraction")
+        self._pool = self._create_pool()
+
+    def _create_pool(self):
+        # Spawned, so parser processes do not inherit the model or the caller's threads
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def _restart(self, pool):
+        """Replace a pool whose worker is stuck or dead, killing its processes"""
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = self._create_pool()
+            self.restarts += 1
+        self._terminate(pool)
+
+    @staticmethod
+    def _terminate(pool):
+        for process in list((pool._processes or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def extract(self, path, file_type):
+        """Extract text from a file on disk, raising ExtractionError when it cannot be read in time"""
+        started = time.perf_counter()
+        try:
+            if file_type == "application/pdf":
+                with self._slots:
+                    result = self._extract_in_pool(path, file_type)
+            else:
+                result = extract_text_from_path(path, file_type)
+        except ExtractionError:
+            self.failed += 1
+            raise
+        except Exception as e:
+            self.failed += 1
+            raise ExtractionError(f"Could not read file: {str(e)}")
+
+        self.extracted += 1
+        self.pages += result.pages
+        self.seconds += time.perf_counter() - started
+        self.slowest_page_seconds = max([self.slowest_page_seconds] + result.page_seconds)
+        return result
+
+    async def extract_async(self, path, file_type):
+        """extract() for async callers, waiting on a dedicated thread instead of the event loop"""
+        return await asyncio.get_running_loop().run_in_executor(self._waiters, self.extract, path, file_type)
+
+    def _extract_in_pool(self, path, file_type):
+        # A restart caused by another file's timeout breaks in-flight work, so retry once
+        for attempt in range(2):
+            pool = self._pool
+            future = pool.submit(extract_text_from_path, path, file_type, self.max_pages)
+            try:
+                return future.result(timeout=self.timeout_seconds)
+            except FutureTimeoutError:
+                self.timeouts += 1
+                self._restart(pool)
+                raise ExtractionError(f"Timed out after {self.timeout_seconds:g} seconds", status=504)
+            except BrokenProcessPool:
+                self._restart(pool)
+                if attempt:
+                    raise ExtractionError("Parser process crashed", status=500)
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "extracted": self.extracted,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "restarts": self.restarts,
+            "pages": self.pages,
+            "avg_seconds": round(self.seconds / self.extracted, 3) if self.extracted else 0.0,
+            "slowest_page_seconds": round(self.slowest_page_seconds, 3)
+        }
+
+    def close(self):
+        self._waiters.shutdown(wait=False, cancel_futures=True)
+        self._terminate(self._pool)